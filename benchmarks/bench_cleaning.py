@@ -0,0 +1,108 @@
+"""Throughput of comment cleaning, in comments per second.
+
+Compares the lazy single-pass Polars plan in main.clean_text_data with the previous
+implementation (pandas -> Polars -> pandas, six regex passes, per-element stopword
+lookups) on synthetic comments.
+
+    python benchmarks/bench_cleaning.py
+    python benchmarks/bench_cleaning.py --rows 1000 100000 --no-legacy
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+import polars as pl
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import main  # noqa: E402
+
+WORDS = [
+    "video", "ini", "bagus", "sekali", "mantap", "keren", "banget", "jelek", "kecewa", "the",
+    "yg", "gue", "lu", "terima", "kasih", "informasinya", "kapan", "upload", "lagi", "bang",
+]
+EXTRAS = ["https://youtu.be/abc123", "www.example.com", ":)", ":D", "XD", "\U0001F600", "2024", "!!!", "#1"]
+STOPWORDS = ["the", "of", "is", "a", "in", "https", "yg", "gua", "gue", "lo", "lu", "gw"]
+
+
+def synthetic_comments(rows: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    comments = []
+    for i in range(rows):
+        tokens = rng.choices(WORDS, k=rng.randint(3, 25))
+        for _ in range(rng.randint(0, 3)):
+            tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(EXTRAS))
+        comments.append((str(i), " ".join(tokens)))
+    return comments
+
+
+def legacy_clean_text_data(df: pd.DataFrame, target_variable: str, all_stopwords: list) -> pd.DataFrame:
+    """The cleaning step before the single-pass rewrite, kept here as the baseline"""
+    pl_df = pl.from_pandas(df)
+    pl_df = pl_df.with_columns(pl.col(target_variable).cast(pl.Utf8).alias(target_variable))
+    pl_df = pl_df.with_columns(
+        pl.col(target_variable)
+        .str.replace(r"https?://\S+|www\.\S+", "", literal=False)
+        .str.replace(r"[:;=X8B][-oO^']?[\)\(DPp\[\]{}@/\|\\<>*~]", "", literal=False)
+        .str.replace(
+            r"[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F700-\U0001F77F]",
+            "", literal=False,
+        )
+        .str.replace(r"\b\d+\b", "", literal=False)
+        .str.replace(r"[^a-zA-Z\s]", "", literal=False)
+        .str.replace(r"\s+", " ", literal=False)
+        .str.strip_chars()
+        .alias("cleaned_text")
+    )
+    stopwords_set = pl.Series("stopwords", all_stopwords)
+    pl_df = pl_df.with_columns(
+        pl.col("cleaned_text")
+        .str.split(" ")
+        .list.eval(
+            pl.when(pl.element().str.to_lowercase().is_in(stopwords_set))
+            .then(None)
+            .otherwise(pl.element())
+        )
+        .list.drop_nulls()
+        .list.join(" ")
+        .alias("cleaned_text")
+    )
+    pl_df = pl_df.filter(pl.col("cleaned_text").str.len_chars() <= 512)
+    return pl_df.to_pandas()
+
+
+def measure(func, repeat: int) -> float:
+    """Best wall time of several runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-legacy", action="store_true", help="skip the previous implementation")
+    args = parser.parse_args()
+
+    main.logger.setLevel("WARNING")
+    print(f"{'rows':>10} {'implementation':>16} {'seconds':>10} {'comments/s':>14}")
+    for rows in args.rows:
+        comments = synthetic_comments(rows)
+        cases = {"polars lazy": lambda: main.clean_text_data(main.comment_frame(comments), "comment", STOPWORDS)}
+        if not args.no_legacy:
+            cases["legacy"] = lambda: legacy_clean_text_data(
+                pd.DataFrame(comments, columns=["comment_id", "comment"]), "comment", STOPWORDS
+            )
+        for name, func in cases.items():
+            seconds = measure(func, args.repeat)
+            print(f"{rows:>10} {name:>16} {seconds:>10.3f} {rows / seconds:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main_cli()
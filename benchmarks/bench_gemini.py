@@ -0,0 +1,65 @@
+"""Wall-clock time of the insights stage against the local fake Gemini server.
+
+Runs the three word cloud prompts and the summary one after another (the old
+behaviour) and then through main.generate_gemini_insights, which sends them together.
+The concurrent run uses a throwaway insights cache, so every run makes live calls and
+the app's own cache is left alone.
+
+    python benchmarks/bench_gemini.py --delay 1.5
+    python benchmarks/bench_gemini.py --fail-rate 0.3
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import main  # noqa: E402
+from fake_gemini import start_server  # noqa: E402
+
+PNG = main._png_bytes(main.Image.new("RGB", (8, 8), "white"))
+IMAGES = {"positive": PNG, "negative": PNG, "neutral": PNG}
+
+
+async def run(args):
+    server, port, fake = await start_server(delay=args.delay, fail_rate=args.fail_rate)
+    client = main.GeminiClient("fake-key", main.GEMINI_MODEL, timeout=args.delay + 5, endpoint=f"127.0.0.1:{port}")
+    try:
+        started = time.perf_counter()
+        budget = {"retries": 0}
+        for label in IMAGES:
+            try:
+                await client.generate([f"Insights for {label}", {"mime_type": "image/png", "data": PNG}], budget)
+            except Exception:
+                pass
+        try:
+            await client.generate("Summary", budget)
+        except Exception:
+            pass
+        sequential = time.perf_counter() - started
+
+        calls_before = fake.calls
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = main.DiskCache(cache_dir, main.INSIGHTS_CACHE_TTL_SECONDS, main.INSIGHTS_CACHE_MAX_BYTES)
+            started = time.perf_counter()
+            responses, summary = await main.generate_gemini_insights("", IMAGES, client=client, cache=cache)
+            concurrent = time.perf_counter() - started
+
+        print(f"fake latency {args.delay:.2f}s, fail rate {args.fail_rate:.0%}")
+        print(f"sequential, no retries: {sequential:.2f}s")
+        print(f"concurrent with retries: {concurrent:.2f}s ({fake.calls - calls_before} calls for 4 answers)")
+        for label, text in {**responses, "summary": summary}.items():
+            print(f"  {label}: {text[:70]}")
+    finally:
+        await server.stop(None)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay", type=float, default=1.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    main.logger.setLevel("ERROR")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,131 @@
+"""Size and build time of the PDF report.
+
+Compares main.create_pdf_report (images drawn at their printed size, palette/Flate or
+JPEG) with the previous writer, which embedded a 150-dpi chart and 1200x600 word
+cloud PNGs losslessly, on synthetic report inputs.
+
+    python benchmarks/bench_report.py
+    python benchmarks/bench_report.py --words 150 --repeat 5 --out /tmp/reports
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import main  # noqa: E402
+
+COLORMAPS = {"positive": "Greens", "negative": "Reds", "neutral": "Blues"}
+INSIGHT = (
+    "- Viewers respond well to the pacing and the presenter's energy.\n"
+    "- Several comments ask for a follow-up video on the same topic.\n"
+    "- Audio quality complaints cluster around the second half.\n"
+) * 4
+
+
+def synthetic_report(words: int, seed: int = 7) -> dict:
+    """Report inputs shaped like AnalysisJob.report, with real word cloud layouts"""
+    rng = random.Random(seed)
+    vocabulary = [f"{rng.choice('bcdfgklmnprstv')}{rng.choice('aeiou')}{rng.choice('klmnrst')}{i}" for i in range(words)]
+    frequencies = {
+        label: {word: rng.randint(1, 400) for word in rng.sample(vocabulary, words)}
+        for label in COLORMAPS
+    }
+    layouts = {
+        label: (main.create_modern_wordcloud(frequencies[label], colormap)[1], colormap)
+        for label, colormap in COLORMAPS.items()
+    }
+    report = {
+        "sentiment_counts": {"positive": 412, "neutral": 903, "negative": 185},
+        "wordcloud_layouts": layouts,
+        "gemini_responses": {label: INSIGHT for label in COLORMAPS},
+        "response_result": INSIGHT * 2,
+        "frequencies": frequencies,
+    }
+    # Same plain-JSON form the pipeline stores
+    return main.json.loads(main.json.dumps(report, default=lambda value: value.item()))
+
+
+def legacy_create_pdf_report(sentiment_counts, wordcloud_layouts, gemini_responses, response_result, frequencies=None):
+    """The report writer before images were sized for print, kept here as the baseline"""
+    pdf = main.fpdf.FPDF()
+    pdf.add_page()
+    pdf.set_font("Helvetica", size=16)
+    pdf.cell(200, 15, text="YouTube Sentiment Analysis Report", new_x="LMARGIN", new_y="NEXT", align="C")
+    pdf.ln(5)
+
+    sentiment_plot = main.create_sentiment_plot(sentiment_counts, fmt="png", dpi=150)
+    pdf.image(io.BytesIO(sentiment_plot), x=10, y=40, w=190)
+    pdf.ln(120)
+
+    for label, (layout, colormap) in wordcloud_layouts.items():
+        wordcloud_png = main._png_bytes(main.render_wordcloud_layout(layout, colormap, 2))
+        pdf.add_page()
+        pdf.set_font("Helvetica", size=14)
+        pdf.cell(200, 10, text=f"{label.title()} Sentiment Analysis", new_x="LMARGIN", new_y="NEXT", align="C")
+        pdf.image(io.BytesIO(wordcloud_png), x=10, y=30, w=190, h=95)
+        pdf.ln(105)
+        pdf.set_font("Helvetica", size=10)
+        pdf.multi_cell(0, 6, main.safe_encode(f"Top words: {main.format_top_words(frequencies[label])}"))
+        pdf.ln(2)
+        pdf.multi_cell(0, 6, main.safe_encode(gemini_responses[label]))
+
+    pdf.add_page()
+    pdf.set_font("Helvetica", size=14)
+    pdf.cell(200, 10, text="Executive Summary & Recommendations", new_x="LMARGIN", new_y="NEXT", align="C")
+    pdf.ln(10)
+    pdf.set_font("Helvetica", size=10)
+    pdf.multi_cell(0, 6, main.safe_encode(response_result))
+    return bytes(pdf.output())
+
+
+def compact(image_format: str):
+    def build(*args):
+        main.REPORT_IMAGE_FORMAT = image_format
+        return main.create_pdf_report(*args)
+    return build
+
+
+def measure(func, args, repeat: int):
+    """Best wall time of several runs, and the output of the last one"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, output
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=main.FREQUENCY_TABLE_SIZE, help="tokens per word cloud")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", help="directory to write the generated PDFs to, for a visual check")
+    args = parser.parse_args()
+
+    main.logger.setLevel("WARNING")
+    report = synthetic_report(args.words)
+    inputs = (
+        report["sentiment_counts"], report["wordcloud_layouts"], report["gemini_responses"],
+        report["response_result"], report["frequencies"],
+    )
+    cases = {
+        "legacy": legacy_create_pdf_report,
+        "compact flate": compact("flate"),
+        "compact jpeg": compact("jpeg"),
+    }
+    print(f"report images at {main.REPORT_IMAGE_DPI} dpi, JPEG quality {main.REPORT_JPEG_QUALITY}")
+    print(f"{'writer':>14} {'seconds':>10} {'KiB':>10}")
+    for name, func in cases.items():
+        seconds, pdf_bytes = measure(func, inputs, args.repeat)
+        print(f"{name:>14} {seconds:>10.3f} {len(pdf_bytes) / 1024:>10.1f}")
+        if args.out:
+            os.makedirs(args.out, exist_ok=True)
+            with open(os.path.join(args.out, f"{name.replace(' ', '_')}.pdf"), "wb") as f:
+                f.write(pdf_bytes)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,76 @@
+"""Local stand-in for the Gemini API, for measuring the insights stage without network or quota.
+
+Serves GenerateContent over plaintext gRPC, answering after a fixed delay and failing a
+configurable share of calls with UNAVAILABLE so retries can be exercised. Point the app
+at it with GEMINI_API_ENDPOINT:
+
+    python benchmarks/fake_gemini.py --port 8765 --delay 1.5
+    GEMINI_API_ENDPOINT=127.0.0.1:8765 python main.py
+"""
+import argparse
+import asyncio
+import random
+
+import grpc
+from google.ai import generativelanguage_v1beta as glm
+
+SERVICE = "google.ai.generativelanguage.v1beta.GenerativeService"
+
+
+class FakeGemini:
+    """GenerateContent handler with a fixed latency and a random failure rate"""
+
+    def __init__(self, delay: float = 1.0, fail_rate: float = 0.0, seed: int = 0):
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.calls = 0
+        self.failures = 0
+        self._rng = random.Random(seed)
+
+    async def generate_content(self, request, context):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self._rng.random() < self.fail_rate:
+            self.failures += 1
+            await context.abort(grpc.StatusCode.UNAVAILABLE, "fake outage")
+        prompt = next((part.text for part in request.contents[0].parts if part.text), "")
+        return glm.GenerateContentResponse(
+            candidates=[
+                glm.Candidate(
+                    content=glm.Content(role="model", parts=[glm.Part(text=f"- Fake insight for: {prompt[:60]}")]),
+                    finish_reason=glm.Candidate.FinishReason.STOP,
+                )
+            ]
+        )
+
+
+async def start_server(port: int = 0, **options):
+    """Start a fake server on 127.0.0.1; returns (server, bound port, handler)"""
+    fake = FakeGemini(**options)
+    server = grpc.aio.server()
+    server.add_generic_rpc_handlers((
+        grpc.method_handlers_generic_handler(SERVICE, {
+            "GenerateContent": grpc.unary_unary_rpc_method_handler(
+                fake.generate_content,
+                request_deserializer=glm.GenerateContentRequest.deserialize,
+                response_serializer=glm.GenerateContentResponse.serialize,
+            ),
+        }),
+    ))
+    port = server.add_insecure_port(f"127.0.0.1:{port}")
+    await server.start()
+    return server, port, fake
+
+
+async def serve(args):
+    server, port, _ = await start_server(args.port, delay=args.delay, fail_rate=args.fail_rate)
+    print(f"Fake Gemini listening on 127.0.0.1:{port} (delay {args.delay}s, fail rate {args.fail_rate})")
+    await server.wait_for_termination()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=1.0, help="seconds before each answer")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of calls answered with UNAVAILABLE")
+    asyncio.run(serve(parser.parse_args()))
@@ -1,1918 +1,2936 @@
-from fastapi import FastAPI, Request, Form, HTTPException
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel
-from youtube_comment_downloader import YoutubeCommentDownloader, SORT_BY_POPULAR
-import pandas as pd
-import os
-import logging
-import seaborn as sns
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud
-from PIL import Image
-from fpdf import FPDF
-from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
-from huggingface_hub import login
-import polars as pl
-import google.generativeai as genai
-from markdown import markdown
-from itertools import islice
-import traceback
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-app = FastAPI()
-
-# Create static directory if it doesn't exist
-os.makedirs("static", exist_ok=True)
-
-app.mount("/static", StaticFiles(directory="static"), name="static")
-
-# Constants
-GEMINI_MODEL = "gemini-2.0-flash"
-# API_KEY = "********************"  
-# HF_TOKEN = "*********************" 
-
-@app.get("/", response_class=HTMLResponse)
-async def read_root(request: Request):
-    return """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>YouTube Sentiment Analyzer Pro</title>
-        <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
-        <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap" rel="stylesheet">
-        <style>
-            * {
-                margin: 0;
-                padding: 0;
-                box-sizing: border-box;
-            }
-
-            :root {
-                --primary-gradient: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                --secondary-gradient: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-                --success-color: #10b981;
-                --warning-color: #f59e0b;
-                --danger-color: #ef4444;
-                --glass-bg: rgba(255, 255, 255, 0.1);
-                --glass-border: rgba(255, 255, 255, 0.2);
-                --text-primary: #1f2937;
-                --text-secondary: #6b7280;
-                --shadow-light: 0 4px 6px rgba(0, 0, 0, 0.1);
-                --shadow-medium: 0 10px 25px rgba(0, 0, 0, 0.15);
-                --shadow-heavy: 0 20px 40px rgba(0, 0, 0, 0.2);
-            }
-
-            body {
-                font-family: 'Inter', sans-serif;
-                background: var(--primary-gradient);
-                min-height: 100vh;
-                overflow-x: hidden;
-                position: relative;
-            }
-
-            /* Animated Background Elements */
-            .bg-animation {
-                position: fixed;
-                top: 0;
-                left: 0;
-                width: 100%;
-                height: 100%;
-                pointer-events: none;
-                z-index: 0;
-                overflow: hidden;
-            }
-
-            .floating-shapes {
-                position: absolute;
-                width: 100%;
-                height: 100%;
-            }
-
-            .shape {
-                position: absolute;
-                opacity: 0.1;
-                animation: float 20s infinite ease-in-out;
-            }
-
-            .shape:nth-child(1) {
-                width: 80px;
-                height: 80px;
-                background: white;
-                border-radius: 50%;
-                top: 10%;
-                left: 10%;
-                animation-delay: 0s;
-            }
-
-            .shape:nth-child(2) {
-                width: 60px;
-                height: 60px;
-                background: white;
-                border-radius: 50%;
-                top: 20%;
-                right: 20%;
-                animation-delay: 5s;
-            }
-
-            .shape:nth-child(3) {
-                width: 100px;
-                height: 100px;
-                background: white;
-                border-radius: 20px;
-                bottom: 20%;
-                left: 15%;
-                animation-delay: 10s;
-            }
-
-            .shape:nth-child(4) {
-                width: 120px;
-                height: 120px;
-                background: white;
-                border-radius: 50%;
-                bottom: 10%;
-                right: 10%;
-                animation-delay: 15s;
-            }
-
-            @keyframes float {
-                0%, 100% { 
-                    transform: translateY(0px) rotate(0deg) scale(1); 
-                }
-                25% { 
-                    transform: translateY(-20px) rotate(5deg) scale(1.1); 
-                }
-                50% { 
-                    transform: translateY(-40px) rotate(-5deg) scale(0.9); 
-                }
-                75% { 
-                    transform: translateY(-20px) rotate(3deg) scale(1.05); 
-                }
-            }
-
-            /* Particle System */
-            .particles {
-                position: absolute;
-                width: 100%;
-                height: 100%;
-            }
-
-            .particle {
-                position: absolute;
-                width: 3px;
-                height: 3px;
-                background: rgba(255, 255, 255, 0.6);
-                border-radius: 50%;
-                animation: particleFloat 8s infinite linear;
-            }
-
-            @keyframes particleFloat {
-                0% {
-                    transform: translateY(100vh) translateX(0px) rotate(0deg);
-                    opacity: 0;
-                }
-                10% {
-                    opacity: 1;
-                }
-                90% {
-                    opacity: 1;
-                }
-                100% {
-                    transform: translateY(-100px) translateX(100px) rotate(360deg);
-                    opacity: 0;
-                }
-            }
-
-            /* Main Container */
-            .main-container {
-                position: relative;
-                z-index: 1;
-                min-height: 100vh;
-                display: flex;
-                flex-direction: column;
-                align-items: center;
-                padding: 2rem;
-            }
-
-            /* Header Section */
-            .header {
-                text-align: center;
-                margin-bottom: 4rem;
-                animation: slideInDown 1s ease-out;
-            }
-
-            @keyframes slideInDown {
-                from {
-                    transform: translateY(-100px);
-                    opacity: 0;
-                }
-                to {
-                    transform: translateY(0);
-                    opacity: 1;
-                }
-            }
-
-            .header h1 {
-                font-size: clamp(2.5rem, 8vw, 4rem);
-                font-weight: 800;
-                background: linear-gradient(45deg, #ffffff, #f0f0f0, #ffffff);
-                -webkit-background-clip: text;
-                -webkit-text-fill-color: transparent;
-                background-clip: text;
-                margin-bottom: 1rem;
-                text-shadow: 0 4px 8px rgba(0, 0, 0, 0.3);
-                position: relative;
-            }
-
-            .header h1::after {
-                content: '';
-                position: absolute;
-                bottom: -10px;
-                left: 50%;
-                transform: translateX(-50%);
-                width: 100px;
-                height: 4px;
-                background: var(--secondary-gradient);
-                border-radius: 2px;
-                animation: expandWidth 1s ease-out 0.5s both;
-            }
-
-            @keyframes expandWidth {
-                from { width: 0; }
-                to { width: 100px; }
-            }
-
-            .header p {
-                font-size: 1.25rem;
-                color: rgba(255, 255, 255, 0.9);
-                font-weight: 300;
-                max-width: 600px;
-                margin: 0 auto;
-                line-height: 1.6;
-            }
-
-            .header .subtitle {
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                gap: 1rem;
-                margin-top: 1rem;
-                animation: fadeInUp 1s ease-out 0.3s both;
-            }
-
-            @keyframes fadeInUp {
-                from {
-                    transform: translateY(30px);
-                    opacity: 0;
-                }
-                to {
-                    transform: translateY(0);
-                    opacity: 1;
-                }
-            }
-
-            /* Form Card */
-            .form-container {
-                width: 100%;
-                max-width: 800px;
-                animation: slideInUp 1s ease-out 0.6s both;
-            }
-
-            @keyframes slideInUp {
-                from {
-                    transform: translateY(100px);
-                    opacity: 0;
-                }
-                to {
-                    transform: translateY(0);
-                    opacity: 1;
-                }
-            }
-
-            .form-card {
-                background: rgba(255, 255, 255, 0.95);
-                backdrop-filter: blur(20px);
-                border: 1px solid var(--glass-border);
-                border-radius: 24px;
-                padding: 3rem;
-                box-shadow: var(--shadow-heavy);
-                transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1);
-                position: relative;
-                overflow: hidden;
-            }
-
-            .form-card::before {
-                content: '';
-                position: absolute;
-                top: 0;
-                left: -100%;
-                width: 100%;
-                height: 2px;
-                background: var(--secondary-gradient);
-                transition: left 0.5s ease;
-            }
-
-            .form-card:hover::before {
-                left: 0;
-            }
-
-            .form-card:hover {
-                transform: translateY(-8px);
-                box-shadow: 0 30px 60px rgba(0, 0, 0, 0.3);
-            }
-
-            /* Form Groups */
-            .form-group {
-                margin-bottom: 2.5rem;
-                animation: fadeIn 0.6s ease-out;
-                animation-fill-mode: both;
-            }
-
-            .form-group:nth-child(1) { animation-delay: 0.8s; }
-            .form-group:nth-child(2) { animation-delay: 1s; }
-            .form-group:nth-child(3) { animation-delay: 1.2s; }
-
-            @keyframes fadeIn {
-                from { opacity: 0; transform: translateY(20px); }
-                to { opacity: 1; transform: translateY(0); }
-            }
-
-            .form-label {
-                display: flex;
-                align-items: center;
-                font-weight: 600;
-                color: var(--text-primary);
-                margin-bottom: 1rem;
-                font-size: 1.1rem;
-                transition: color 0.3s ease;
-            }
-
-            .form-label i {
-                margin-right: 0.75rem;
-                font-size: 1.2rem;
-                background: var(--primary-gradient);
-                -webkit-background-clip: text;
-                -webkit-text-fill-color: transparent;
-                background-clip: text;
-            }
-
-            .form-control {
-                width: 100%;
-                padding: 1.25rem 1.5rem;
-                border: 2px solid #e5e7eb;
-                border-radius: 16px;
-                font-size: 1rem;
-                font-family: 'Inter', sans-serif;
-                background: #f9fafb;
-                transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-                position: relative;
-            }
-
-            .form-control:focus {
-                outline: none;
-                border-color: #667eea;
-                background: white;
-                box-shadow: 0 0 0 4px rgba(102, 126, 234, 0.1);
-                transform: translateY(-2px);
-            }
-
-            .form-control:hover {
-                border-color: #9ca3af;
-                background: white;
-                transform: translateY(-1px);
-            }
-
-            textarea.form-control {
-                resize: vertical;
-                min-height: 140px;
-                font-family: 'Inter', sans-serif;
-            }
-
-            /* Submit Button */
-            .btn-submit {
-                width: 100%;
-                padding: 1.5rem 2rem;
-                background: var(--primary-gradient);
-                color: white;
-                border: none;
-                border-radius: 16px;
-                font-size: 1.2rem;
-                font-weight: 700;
-                cursor: pointer;
-                transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1);
-                position: relative;
-                overflow: hidden;
-                text-transform: uppercase;
-                letter-spacing: 1px;
-                margin-top: 1rem;
-                animation: fadeIn 0.6s ease-out 1.4s both;
-            }
-
-            .btn-submit::before {
-                content: '';
-                position: absolute;
-                top: 0;
-                left: -100%;
-                width: 100%;
-                height: 100%;
-                background: linear-gradient(90deg, transparent, rgba(255,255,255,0.4), transparent);
-                transition: left 0.6s ease;
-            }
-
-            .btn-submit:hover::before {
-                left: 100%;
-            }
-
-            .btn-submit:hover {
-                transform: translateY(-4px);
-                box-shadow: 0 20px 40px rgba(102, 126, 234, 0.4);
-                background: var(--secondary-gradient);
-            }
-
-            .btn-submit:active {
-                transform: translateY(-2px);
-            }
-
-            .btn-submit:disabled {
-                opacity: 0.7;
-                cursor: not-allowed;
-                transform: none;
-            }
-
-            /* Loading State */
-            .loading-overlay {
-                position: fixed;
-                top: 0;
-                left: 0;
-                width: 100%;
-                height: 100%;
-                background: rgba(0, 0, 0, 0.8);
-                display: none;
-                justify-content: center;
-                align-items: center;
-                z-index: 1000;
-                backdrop-filter: blur(5px);
-            }
-
-            .loading-overlay.show {
-                display: flex;
-                animation: fadeIn 0.3s ease-out;
-            }
-
-            .loading-content {
-                background: white;
-                padding: 3rem;
-                border-radius: 20px;
-                text-align: center;
-                box-shadow: var(--shadow-heavy);
-                animation: scaleIn 0.3s ease-out;
-            }
-
-            @keyframes scaleIn {
-                from { transform: scale(0.8); opacity: 0; }
-                to { transform: scale(1); opacity: 1; }
-            }
-
-            .spinner {
-                width: 60px;
-                height: 60px;
-                border: 4px solid #f3f4f6;
-                border-top: 4px solid #667eea;
-                border-radius: 50%;
-                animation: spin 1s linear infinite;
-                margin: 0 auto 1.5rem;
-            }
-
-            @keyframes spin {
-                0% { transform: rotate(0deg); }
-                100% { transform: rotate(360deg); }
-            }
-
-            .loading-text {
-                color: var(--text-primary);
-                font-size: 1.2rem;
-                font-weight: 600;
-                margin-bottom: 0.5rem;
-            }
-
-            .loading-subtext {
-                color: var(--text-secondary);
-                font-size: 0.9rem;
-            }
-
-            /* Features Grid */
-            .features-grid {
-                display: grid;
-                grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-                gap: 2rem;
-                margin-top: 4rem;
-                max-width: 1000px;
-                width: 100%;
-                animation: fadeIn 1s ease-out 1.6s both;
-            }
-
-            .feature-card {
-                background: var(--glass-bg);
-                backdrop-filter: blur(10px);
-                border: 1px solid var(--glass-border);
-                border-radius: 20px;
-                padding: 2rem;
-                text-align: center;
-                transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1);
-                cursor: pointer;
-                position: relative;
-                overflow: hidden;
-            }
-
-            .feature-card::before {
-                content: '';
-                position: absolute;
-                top: 0;
-                left: 0;
-                width: 100%;
-                height: 100%;
-                background: linear-gradient(45deg, transparent, rgba(255,255,255,0.1), transparent);
-                transform: translateX(-100%);
-                transition: transform 0.6s ease;
-            }
-
-            .feature-card:hover::before {
-                transform: translateX(100%);
-            }
-
-            .feature-card:hover {
-                transform: translateY(-10px) scale(1.02);
-                background: rgba(255, 255, 255, 0.15);
-                box-shadow: var(--shadow-heavy);
-            }
-
-            .feature-icon {
-                font-size: 3rem;
-                margin-bottom: 1.5rem;
-                background: var(--secondary-gradient);
-                -webkit-background-clip: text;
-                -webkit-text-fill-color: transparent;
-                background-clip: text;
-                animation: bounce 2s infinite;
-            }
-
-            @keyframes bounce {
-                0%, 20%, 50%, 80%, 100% { transform: translateY(0); }
-                40% { transform: translateY(-10px); }
-                60% { transform: translateY(-5px); }
-            }
-
-            .feature-title {
-                color: white;
-                font-weight: 700;
-                font-size: 1.3rem;
-                margin-bottom: 1rem;
-            }
-
-            .feature-description {
-                color: rgba(255, 255, 255, 0.8);
-                line-height: 1.6;
-                font-size: 0.95rem;
-            }
-
-            /* Responsive Design */
-            @media (max-width: 768px) {
-                .main-container {
-                    padding: 1rem;
-                }
-
-                .form-card {
-                    padding: 2rem;
-                    margin: 1rem;
-                }
-
-                .features-grid {
-                    grid-template-columns: 1fr;
-                    margin-top: 3rem;
-                }
-
-                .header h1 {
-                    font-size: 2.5rem;
-                }
-            }
-
-            @media (max-width: 480px) {
-                .form-card {
-                    padding: 1.5rem;
-                    border-radius: 16px;
-                }
-
-                .btn-submit {
-                    padding: 1.25rem 1.5rem;
-                    font-size: 1.1rem;
-                }
-            }
-
-            /* Custom Scrollbar */
-            ::-webkit-scrollbar {
-                width: 8px;
-            }
-
-            ::-webkit-scrollbar-track {
-                background: rgba(255, 255, 255, 0.1);
-                border-radius: 4px;
-            }
-
-            ::-webkit-scrollbar-thumb {
-                background: rgba(255, 255, 255, 0.3);
-                border-radius: 4px;
-            }
-
-            ::-webkit-scrollbar-thumb:hover {
-                background: rgba(255, 255, 255, 0.5);
-            }
-
-            /* Progress Bar */
-            .progress-container {
-                position: fixed;
-                top: 0;
-                left: 0;
-                width: 100%;
-                height: 4px;
-                background: rgba(255, 255, 255, 0.1);
-                z-index: 1001;
-            }
-
-            .progress-bar {
-                height: 100%;
-                background: var(--secondary-gradient);
-                width: 0%;
-                transition: width 0.3s ease;
-            }
-        </style>
-    </head>
-    <body>
-        <!-- Progress Bar -->
-        <div class="progress-container">
-            <div class="progress-bar" id="progressBar"></div>
-        </div>
-
-        <!-- Background Animation -->
-        <div class="bg-animation">
-            <div class="floating-shapes">
-                <div class="shape"></div>
-                <div class="shape"></div>
-                <div class="shape"></div>
-                <div class="shape"></div>
-            </div>
-            <div class="particles" id="particlesContainer"></div>
-        </div>
-
-        <!-- Loading Overlay -->
-        <div class="loading-overlay" id="loadingOverlay">
-            <div class="loading-content">
-                <div class="spinner"></div>
-                <div class="loading-text">Analyzing Comments...</div>
-                <div class="loading-subtext">This may take a few moments while we process your data</div>
-            </div>
-        </div>
-
-        <!-- Main Container -->
-        <div class="main-container">
-            <!-- Header -->
-            <header class="header">
-                <h1>
-                    <i class="fab fa-youtube"></i>
-                    YouTube Sentiment Analyzer Pro
-                </h1>
-                <p>Transform YouTube comments into actionable business insights with AI-powered sentiment analysis</p>
-                <div class="subtitle">
-                    <span><i class="fas fa-robot"></i> AI-Powered</span>
-                    <span><i class="fas fa-chart-line"></i> Real-time Analysis</span>
-                    <span><i class="fas fa-download"></i> PDF Reports</span>
-                </div>
-            </header>
-
-            <!-- Form Container -->
-            <div class="form-container">
-                <div class="form-card">
-                    <form id="sentimentForm" action="/analyze" method="post">
-                        <div class="form-group">
-                            <label class="form-label" for="youtube_url">
-                                <i class="fas fa-link"></i>
-                                YouTube Video URL
-                            </label>
-                            <input 
-                                type="url" 
-                                class="form-control" 
-                                id="youtube_url" 
-                                name="youtube_url" 
-                                placeholder="https://www.youtube.com/watch?v=example" 
-                                required
-                            >
-                        </div>
-
-                        <div class="form-group">
-                            <label class="form-label" for="custom_stopwords">
-                                <i class="fas fa-filter"></i>
-                                Custom Stopwords (Optional)
-                            </label>
-                            <input 
-                                type="text" 
-                                class="form-control" 
-                                id="custom_stopwords" 
-                                name="custom_stopwords" 
-                                placeholder="Enter words to exclude: spam, bot, fake..."
-                            >
-                        </div>
-
-                        <div class="form-group">
-                            <label class="form-label" for="custom_question">
-                                <i class="fas fa-question-circle"></i>
-                                Analysis Focus Question
-                            </label>
-                            <textarea 
-                                class="form-control" 
-                                id="custom_question" 
-                                name="custom_question" 
-                                rows="4"
-                                placeholder="What specific insights would you like to discover from the sentiment analysis?"
-                            >Please provide insights based on the sentiment analysis:</textarea>
-                        </div>
-
-                        <button type="submit" class="btn-submit">
-                            <i class="fas fa-chart-pie"></i>
-                            Analyze Sentiment
-                        </button>
-                    </form>
-                </div>
-            </div>
-
-            <!-- Features Grid -->
-            <div class="features-grid">
-                <div class="feature-card">
-                    <div class="feature-icon">
-                        <i class="fas fa-brain"></i>
-                    </div>
-                    <div class="feature-title">AI-Powered Analysis</div>
-                    <div class="feature-description">
-                        Advanced machine learning models analyze sentiment with high accuracy and context understanding
-                    </div>
-                </div>
-
-                <div class="feature-card">
-                    <div class="feature-icon">
-                        <i class="fas fa-cloud-word"></i>
-                    </div>
-                    <div class="feature-title">Visual Word Clouds</div>
-                    <div class="feature-description">
-                        Interactive word clouds reveal key themes and trending topics in positive, negative, and neutral comments
-                    </div>
-                </div>
-
-                <div class="feature-card">
-                    <div class="feature-icon">
-                        <i class="fas fa-chart-bar"></i>
-                    </div>
-                    <div class="feature-title">Comprehensive Reports</div>
-                    <div class="feature-description">
-                        Detailed analytics with charts, insights, and actionable recommendations for business decisions
-                    </div>
-                </div>
-
-                <div class="feature-card">
-                    <div class="feature-icon">
-                        <i class="fas fa-mobile-alt"></i>
-                    </div>
-                    <div class="feature-title">Responsive Design</div>
-                    <div class="feature-description">
-                        Seamless experience across all devices - desktop, tablet, and mobile with touch-optimized interface
-                    </div>
-                </div>
-            </div>
-        </div>
-
-        <script>
-            // Initialize page animations and interactions
-            class SentimentAnalyzer {
-                constructor() {
-                    this.init();
-                }
-
-                init() {
-                    this.createParticles();
-                    this.setupFormHandlers();
-                    this.setupScrollProgress();
-                    this.setupInputAnimations();
-                    this.setupFeatureAnimations();
-                }
-
-                // Create floating particles
-                createParticles() {
-                    const container = document.getElementById('particlesContainer');
-                    const particleCount = 30;
-
-                    for (let i = 0; i < particleCount; i++) {
-                        const particle = document.createElement('div');
-                        particle.className = 'particle';
-                        
-                        // Random positioning and timing
-                        particle.style.left = Math.random() * 100 + '%';
-                        particle.style.animationDelay = Math.random() * 8 + 's';
-                        particle.style.animationDuration = (8 + Math.random() * 4) + 's';
-                        
-                        container.appendChild(particle);
-                    }
-                }
-
-                // Setup form submission handling
-                setupFormHandlers() {
-                    const form = document.getElementById('sentimentForm');
-                    const loadingOverlay = document.getElementById('loadingOverlay');
-
-                    form.addEventListener('submit', (e) => {
-                        // Show loading overlay
-                        loadingOverlay.classList.add('show');
-                        
-                        // Disable form
-                        const submitBtn = form.querySelector('.btn-submit');
-                        submitBtn.disabled = true;
-                        submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Processing...';
-                    });
-                }
-
-                // Setup scroll progress bar
-                setupScrollProgress() {
-                    const progressBar = document.getElementById('progressBar');
-                    
-                    window.addEventListener('scroll', () => {
-                        const scrollTop = window.pageYOffset;
-                        const docHeight = document.body.offsetHeight - window.innerHeight;
-                        const scrollPercent = (scrollTop / docHeight) * 100;
-                        
-                        progressBar.style.width = scrollPercent + '%';
-                    });
-                }
-
-                // Setup input animations
-                setupInputAnimations() {
-                    const inputs = document.querySelectorAll('.form-control');
-                    
-                    inputs.forEach(input => {
-                        input.addEventListener('focus', () => {
-                            input.parentElement.style.transform = 'scale(1.02)';
-                            input.parentElement.style.transition = 'transform 0.3s ease';
-                        });
-
-                        input.addEventListener('blur', () => {
-                            input.parentElement.style.transform = 'scale(1)';
-                        });
-
-                        // Real-time validation feedback
-                        input.addEventListener('input', () => {
-                            if (input.checkValidity()) {
-                                input.style.borderColor = '#10b981';
-                            } else {
-                                input.style.borderColor = '#ef4444';
-                            }
-                        });
-                    });
-                }
-
-                // Setup feature card animations
-                setupFeatureAnimations() {
-                    const features = document.querySelectorAll('.feature-card');
-                    
-                    const observer = new IntersectionObserver((entries) => {
-                        entries.forEach((entry, index) => {
-                            if (entry.isIntersecting) {
-                                setTimeout(() => {
-                                    entry.target.style.opacity = '1';
-                                    entry.target.style.transform = 'translateY(0)';
-                                }, index * 100);
-                            }
-                        });
-                    }, { threshold: 0.1 });
-
-                    features.forEach(feature => {
-                        feature.style.opacity = '0';
-                        feature.style.transform = 'translateY(50px)';
-                        feature.style.transition = 'all 0.6s ease';
-                        observer.observe(feature);
-                    });
-                }
-            }
-
-            // Add ripple effect to button
-            function addRippleEffect() {
-                const button = document.querySelector('.btn-submit');
-                
-                button.addEventListener('click', function(e) {
-                    const ripple = document.createElement('div');
-                    const rect = this.getBoundingClientRect();
-                    const size = Math.max(rect.width, rect.height);
-                    const x = e.clientX - rect.left - size / 2;
-                    const y = e.clientY - rect.top - size / 2;
-                    
-                    ripple.style.cssText = `
-                        position: absolute;
-                        width: ${size}px;
-                        height: ${size}px;
-                        left: ${x}px;
-                        top: ${y}px;
-                        background: rgba(255,255,255,0.4);
-                        border-radius: 50%;
-                        transform: scale(0);
-                        animation: ripple 0.8s ease-out;
-                        pointer-events: none;
-                    `;
-                    
-                    this.appendChild(ripple);
-                    
-                    setTimeout(() => ripple.remove(), 800);
-                });
-            }
-
-            // Add CSS for ripple animation
-            const rippleStyle = document.createElement('style');
-            rippleStyle.textContent = `
-                @keyframes ripple {
-                    to {
-                        transform: scale(2.5);
-                        opacity: 0;
-                    }
-                }
-            `;
-            document.head.appendChild(rippleStyle);
-
-            // Initialize everything when DOM is loaded
-            document.addEventListener('DOMContentLoaded', () => {
-                new SentimentAnalyzer();
-                addRippleEffect();
-            });
-        </script>
-    </body>
-    </html>
-    """
-
-def safe_encode(text):
-    """Safely encode text for PDF generation"""
-    try:
-        # Replace problematic characters
-        text = str(text)
-        # Remove or replace non-Latin characters
-        text = text.encode('ascii', errors='ignore').decode('ascii')
-        return text
-    except Exception as e:
-        logger.error(f"Error encoding text: {e}")
-        return "Error encoding text"
-
-def clean_text_data(df: pd.DataFrame, target_variable: str, all_stopwords: list) -> pd.DataFrame:
-    """Clean text data using Polars for better performance"""
-    try:
-        logger.info("Starting text cleaning process with Polars")
-        
-        # Convert Pandas DataFrame to Polars DataFrame
-        pl_df = pl.from_pandas(df)
-        
-        # Define regex patterns
-        hyperlink_pattern = r"https?://\S+|www\.\S+"
-        emoticon_pattern = r"[:;=X8B][-oO^']?[\)\(DPp\[\]{}@/\|\\<>*~]"
-        emoji_pattern = r"[\U0001F600-\U0001F64F\U0001F300-\U0001F5FF\U0001F680-\U0001F6FF\U0001F700-\U0001F77F]"
-        number_pattern = r"\b\d+\b"
-        special_char_pattern = r"[^a-zA-Z\s]"
-
-        # Ensure target_variable is of type string
-        pl_df = pl_df.with_columns(
-            pl.col(target_variable).cast(pl.Utf8).alias(target_variable)
-        )
-
-        # Apply text cleaning steps
-        pl_df = pl_df.with_columns(
-            pl.col(target_variable)
-            .str.replace(hyperlink_pattern, "", literal=False)
-            .str.replace(emoticon_pattern, "", literal=False)
-            .str.replace(emoji_pattern, "", literal=False)
-            .str.replace(number_pattern, "", literal=False)
-            .str.replace(special_char_pattern, "", literal=False)
-            .str.replace(r"\s+", " ", literal=False)
-            .str.strip_chars()
-            .alias("cleaned_text")
-        )
-
-        # Remove stopwords
-        stopwords_set = pl.Series("stopwords", all_stopwords)
-
-        pl_df = pl_df.with_columns(
-            pl.col("cleaned_text")
-            .str.split(" ")
-            .list.eval(
-                pl.when(pl.element().str.to_lowercase().is_in(stopwords_set))
-                .then(None)
-                .otherwise(pl.element())
-            )
-            .list.drop_nulls()
-            .list.join(" ")
-            .alias("cleaned_text")
-        )
-
-        # Drop rows where cleaned_text length is greater than 512
-        pl_df = pl_df.filter(pl.col("cleaned_text").str.len_chars() <= 512)
-
-        logger.info(f"Text cleaning complete. Final dataframe shape: {pl_df.shape}")
-        return pl_df.to_pandas()
-    
-    except Exception as e:
-        logger.error(f"Error in text cleaning: {e}")
-        # Return original dataframe with a simple cleaned_text column
-        df['cleaned_text'] = df[target_variable].astype(str)
-        return df
-
-def analyze_sentiment(text, sentiment_analysis, label_index):
-    """Analyze sentiment with error handling"""
-    try:
-        if not text or text.strip() == "":
-            return pd.Series({"sentiment_label": "neutral", "sentiment_score": 0.5})
-        
-        result = sentiment_analysis(text)
-        label = label_index.get(result[0]["label"], "neutral")
-        score = result[0]["score"]
-        return pd.Series({"sentiment_label": label, "sentiment_score": score})
-    except Exception as e:
-        logger.error(f"Error in sentiment analysis: {e}")
-        return pd.Series({"sentiment_label": "neutral", "sentiment_score": 0.5})
-
-def create_modern_wordcloud(text, filename, colormap):
-    """Create wordcloud with error handling"""
-    try:
-        if not text or text.strip() == "":
-            return None
-            
-        wordcloud = WordCloud(
-            min_font_size=8,
-            max_words=150,
-            width=1200,
-            height=600,
-            colormap=colormap,
-            background_color="white",
-            margin=20,
-            relative_scaling=0.5,
-            font_path=None
-        ).generate(text)
-
-        wordcloud_path = f"static/{filename}"
-        wordcloud.to_file(wordcloud_path)
-        return wordcloud_path
-    except Exception as e:
-        logger.error(f"Error creating wordcloud {filename}: {e}")
-        return None
-
-@app.post("/analyze", response_class=HTMLResponse)
-async def analyze_youtube(
-    youtube_url: str = Form(...),
-    custom_stopwords: str = Form(""),
-    custom_question: str = Form("Please provide insights based on the sentiment analysis:"),
-):
-    try:
-        logger.info(f"Starting analysis for URL: {youtube_url}")
-        
-        # Validate inputs
-        if not youtube_url:
-            raise HTTPException(status_code=400, detail="YouTube URL is required")
-        
-        # Login to Hugging Face
-        try:
-            login(HF_TOKEN)
-            logger.info("Successfully logged into Hugging Face")
-        except Exception as e:
-            logger.error(f"Failed to login to Hugging Face: {e}")
-            raise HTTPException(status_code=500, detail="Authentication failed")
-
-        # Initialize the downloader
-        downloader = YoutubeCommentDownloader()
-
-        # Fetch comments from a YouTube URL
-        try:
-            comments = downloader.get_comments_from_url(
-                youtube_url,
-                sort_by=SORT_BY_POPULAR
-            )
-            # Collect all "text" fields
-            comment_texts = [comment['text'] for comment in islice(comments, 1000)]
-            logger.info(f"Fetched {len(comment_texts)} comments")
-        except Exception as e:
-            logger.error(f"Error fetching comments: {e}")
-            raise HTTPException(status_code=400, detail="Failed to fetch comments. Please check the YouTube URL.")
-
-        # Create a DataFrame
-        df = pd.DataFrame(comment_texts, columns=["comment"])
-
-        if df.empty:
-            return """
-            <!DOCTYPE html>
-            <html lang="en">
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>No Comments Found</title>
-                <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
-                <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap" rel="stylesheet">
-                <style>
-                    body {
-                        font-family: 'Inter', sans-serif;
-                        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                        min-height: 100vh;
-                        display: flex;
-                        justify-content: center;
-                        align-items: center;
-                        margin: 0;
-                    }
-                    .error-container {
-                        background: white;
-                        padding: 3rem;
-                        border-radius: 24px;
-                        text-align: center;
-                        box-shadow: 0 20px 60px rgba(0,0,0,0.2);
-                        max-width: 500px;
-                        animation: slideIn 0.5s ease-out;
-                    }
-                    @keyframes slideIn {
-                        from { transform: translateY(50px); opacity: 0; }
-                        to { transform: translateY(0); opacity: 1; }
-                    }
-                    .error-icon {
-                        font-size: 4rem;
-                        color: #f59e0b;
-                        margin-bottom: 1.5rem;
-                        animation: bounce 1s infinite;
-                    }
-                    @keyframes bounce {
-                        0%, 20%, 50%, 80%, 100% { transform: translateY(0); }
-                        40% { transform: translateY(-10px); }
-                        60% { transform: translateY(-5px); }
-                    }
-                    .error-title {
-                        color: #dc2626;
-                        font-size: 1.8rem;
-                        font-weight: 700;
-                        margin-bottom: 1rem;
-                    }
-                    .error-message {
-                        color: #6b7280;
-                        margin-bottom: 2rem;
-                        line-height: 1.6;
-                    }
-                    .btn-back {
-                        background: linear-gradient(135deg, #667eea, #764ba2);
-                        color: white;
-                        padding: 1rem 2rem;
-                        text-decoration: none;
-                        border-radius: 12px;
-                        display: inline-block;
-                        transition: all 0.3s ease;
-                        font-weight: 600;
-                    }
-                    .btn-back:hover {
-                        transform: translateY(-2px);
-                        box-shadow: 0 10px 25px rgba(102, 126, 234, 0.4);
-                        text-decoration: none;
-                        color: white;
-                    }
-                </style>
-            </head>
-            <body>
-                <div class="error-container">
-                    <div class="error-icon">
-                        <i class="fas fa-exclamation-triangle"></i>
-                    </div>
-                    <h2 class="error-title">No Comments Found</h2>
-                    <p class="error-message">
-                        We couldn't find any comments for this video. This might happen if:
-                        <br>• Comments are disabled on the video
-                        <br>• The video is private or doesn't exist
-                        <br>• There are no comments yet
-                    </p>
-                    <a href="/" class="btn-back">
-                        <i class="fas fa-arrow-left"></i> Try Another Video
-                    </a>
-                </div>
-            </body>
-            </html>
-            """
-
-        # Process stopwords
-        add_stopwords = [
-            "the", "of", "is", "a", "in", "https", "yg", "gua", "gue", "lo", "lu", "gw",
-        ]
-        custom_stopword_list = [word.strip() for word in custom_stopwords.split(",") if word.strip()]
-        all_stopwords = add_stopwords + custom_stopword_list
-
-        # Clean text data
-        df = clean_text_data(df, "comment", all_stopwords)
-
-        # Perform Sentiment Analysis
-        try:
-            pretrained = "mdhugol/indonesia-bert-sentiment-classification"
-            model = AutoModelForSequenceClassification.from_pretrained(
-                pretrained, token=HF_TOKEN
-            )
-            tokenizer = AutoTokenizer.from_pretrained(pretrained, token=HF_TOKEN)
-            sentiment_analysis = pipeline(
-                "sentiment-analysis", model=model, tokenizer=tokenizer
-            )
-            label_index = {
-                "LABEL_0": "positive",
-                "LABEL_1": "neutral",
-                "LABEL_2": "negative",
-            }
-            logger.info("Sentiment analysis model loaded successfully")
-        except Exception as e:
-            logger.error(f"Error loading sentiment model: {e}")
-            raise HTTPException(status_code=500, detail="Failed to load sentiment analysis model")
-
-        # Apply sentiment analysis
-        try:
-            df[["sentiment_label", "sentiment_score"]] = df["cleaned_text"].apply(
-                lambda text: analyze_sentiment(text, sentiment_analysis, label_index)
-            )
-            logger.info("Sentiment analysis completed")
-        except Exception as e:
-            logger.error(f"Error during sentiment analysis: {e}")
-            # Fallback to random sentiment assignment
-            df["sentiment_label"] = "neutral"
-            df["sentiment_score"] = 0.5
-
-        # Count the occurrences of each sentiment label
-        sentiment_counts = df["sentiment_label"].value_counts()
-
-        # Create modern sentiment distribution plot
-        try:
-            plt.style.use('default')
-            fig, ax = plt.subplots(figsize=(12, 8))
-            
-            colors = ['#10B981', '#F59E0B', '#EF4444']  # Green, Yellow, Red
-            bars = ax.bar(sentiment_counts.index, sentiment_counts.values, 
-                          color=colors, alpha=0.8, edgecolor='white', linewidth=2)
-            
-            # Add value labels on bars
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height + 1,
-                        f'{int(height)}', ha='center', va='bottom', fontweight='bold', fontsize=14)
-            
-            ax.set_title('Sentiment Distribution Analysis', fontsize=20, fontweight='bold', pad=20)
-            ax.set_xlabel('Sentiment Category', fontsize=14, fontweight='600')
-            ax.set_ylabel('Number of Comments', fontsize=14, fontweight='600')
-            ax.grid(True, alpha=0.3, linestyle='--')
-            ax.set_facecolor('#f8f9fa')
-            
-            # Style the plot
-            ax.spines['top'].set_visible(False)
-            ax.spines['right'].set_visible(False)
-            ax.spines['left'].set_color('#dee2e6')
-            ax.spines['bottom'].set_color('#dee2e6')
-            
-            plt.tight_layout()
-            sentiment_plot_path = "static/sentiment_distribution.png"
-            plt.savefig(sentiment_plot_path, dpi=300, bbox_inches='tight', facecolor='white')
-            plt.close()
-            logger.info("Sentiment distribution plot created")
-        except Exception as e:
-            logger.error(f"Error creating sentiment plot: {e}")
-            sentiment_plot_path = None
-
-        # Concatenate Cleaned text
-        positive_text = " ".join(df[df["sentiment_label"] == "positive"]["cleaned_text"])
-        negative_text = " ".join(df[df["sentiment_label"] == "negative"]["cleaned_text"])
-        neutral_text = " ".join(df[df["sentiment_label"] == "neutral"]["cleaned_text"])
-
-        # Generate wordclouds with different color schemes
-        wordcloud_positive = create_modern_wordcloud(positive_text, "wordcloud_positive.png", "Greens")
-        wordcloud_negative = create_modern_wordcloud(negative_text, "wordcloud_negative.png", "Reds")
-        wordcloud_neutral = create_modern_wordcloud(neutral_text, "wordcloud_neutral.png", "Blues")
-
-        # Generate Gemini responses for each sentiment
-        gemini_responses = {}
-        try:
-            genai.configure(api_key=API_KEY)
-            model = genai.GenerativeModel(GEMINI_MODEL)
-
-            sentiment_types = [
-                ("positive", wordcloud_positive, "positive"),
-                ("negative", wordcloud_negative, "negative"),
-                ("neutral", wordcloud_neutral, "neutral")
-            ]
-
-            for sentiment_type, wordcloud_path, label in sentiment_types:
-                if wordcloud_path:
-                    try:
-                        img = Image.open(wordcloud_path)
-                        response = model.generate_content([
-                            f"{custom_question} As a marketing consultant, I aim to analyze consumer insights derived from the {label} sentiment wordcloud. Please provide actionable insights and recommendations based on this {label} sentiment analysis in a structured format with bullet points.",
-                            img,
-                        ])
-                        response.resolve()
-                        gemini_responses[sentiment_type] = response.text
-                        logger.info(f"Generated Gemini response for {sentiment_type}")
-                    except Exception as e:
-                        logger.error(f"Error generating content with Gemini for {sentiment_type}: {e}")
-                        gemini_responses[sentiment_type] = f"Analysis for {sentiment_type} sentiment: Unable to generate detailed insights due to processing limitations."
-            
-        except Exception as e:
-            logger.error(f"Error with Gemini API: {e}")
-            gemini_responses = {
-                "positive": "Positive sentiment analysis: Processing error occurred.",
-                "negative": "Negative sentiment analysis: Processing error occurred.",
-                "neutral": "Neutral sentiment analysis: Processing error occurred."
-            }
-
-        # Generate comprehensive summary
-        response_result = None
-        try:
-            if gemini_responses:
-                summary_prompt = f"{custom_question} Based on the overall sentiment analysis of YouTube comments, please provide a comprehensive business strategy summary with key insights and actionable recommendations."
-                response = model.generate_content(summary_prompt)
-                response.resolve()
-                response_result = response.text
-        except Exception as e:
-            logger.error(f"Error generating summary: {e}")
-            response_result = "Executive summary: Analysis completed with limited processing capabilities."
-
-        # Generate enhanced PDF report
-        try:
-            pdf = FPDF()
-            pdf.add_page()
-            pdf.set_font("Arial", size=16)
-            pdf.cell(200, 15, txt="YouTube Sentiment Analysis Report", ln=True, align="C")
-            pdf.ln(5)
-
-            # Add sentiment distribution
-            if sentiment_plot_path and os.path.exists(sentiment_plot_path):
-                pdf.image(sentiment_plot_path, x=10, y=40, w=190)
-                pdf.ln(120)
-
-            # Add wordclouds and analysis
-            for sentiment_type, wordcloud_path, label in [
-                ("positive", wordcloud_positive, "positive"),
-                ("negative", wordcloud_negative, "negative"), 
-                ("neutral", wordcloud_neutral, "neutral")
-            ]:
-                if wordcloud_path and os.path.exists(wordcloud_path) and sentiment_type in gemini_responses:
-                    pdf.add_page()
-                    pdf.set_font("Arial", size=14)
-                    pdf.cell(200, 10, txt=f"{label.title()} Sentiment Analysis", ln=True, align="C")
-                    pdf.image(wordcloud_path, x=10, y=30, w=190, h=95)
-                    pdf.ln(105)
-                    pdf.set_font("Arial", size=10)
-                    pdf.multi_cell(0, 6, safe_encode(gemini_responses[sentiment_type]))
-
-            if response_result:
-                pdf.add_page()
-                pdf.set_font("Arial", size=14)
-                pdf.cell(200, 10, txt="Executive Summary & Recommendations", ln=True, align="C")
-                pdf.ln(10)
-                pdf.set_font("Arial", size=10)
-                pdf.multi_cell(0, 6, safe_encode(response_result))
-
-            pdf_file_path = "static/sentiment_analysis_report.pdf"
-            pdf.output(pdf_file_path)
-            logger.info("PDF report generated successfully")
-        except Exception as e:
-            logger.error(f"Error generating PDF: {e}")
-
-        # Create modern results HTML
-        results_html = f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Sentiment Analysis Results</title>
-            <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
-            <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800&display=swap" rel="stylesheet">
-            <style>
-                * {{
-                    margin: 0;
-                    padding: 0;
-                    box-sizing: border-box;
-                }}
-
-                body {{
-                    font-family: 'Inter', sans-serif;
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    min-height: 100vh;
-                    color: #1f2937;
-                }}
-
-                .results-container {{
-                    max-width: 1200px;
-                    margin: 0 auto;
-                    padding: 2rem;
-                    animation: fadeIn 1s ease-out;
-                }}
-
-                @keyframes fadeIn {{
-                    from {{ opacity: 0; transform: translateY(30px); }}
-                    to {{ opacity: 1; transform: translateY(0); }}
-                }}
-
-                .results-header {{
-                    text-align: center;
-                    margin-bottom: 3rem;
-                    color: white;
-                }}
-
-                .results-header h1 {{
-                    font-size: 3rem;
-                    font-weight: 800;
-                    margin-bottom: 1rem;
-                    background: linear-gradient(45deg, #ffffff, #f0f0f0);
-                    -webkit-background-clip: text;
-                    -webkit-text-fill-color: transparent;
-                    background-clip: text;
-                }}
-
-                .results-header p {{
-                    font-size: 1.2rem;
-                    opacity: 0.9;
-                }}
-
-                .result-card {{
-                    background: rgba(255, 255, 255, 0.95);
-                    border-radius: 20px;
-                    margin-bottom: 2rem;
-                    box-shadow: 0 15px 35px rgba(0, 0, 0, 0.2);
-                    backdrop-filter: blur(20px);
-                    border: 1px solid rgba(255, 255, 255, 0.2);
-                    overflow: hidden;
-                    transition: all 0.3s ease;
-                    animation: slideUp 0.8s ease-out;
-                    animation-fill-mode: both;
-                }}
-
-                .result-card:nth-child(even) {{ animation-delay: 0.2s; }}
-                .result-card:nth-child(odd) {{ animation-delay: 0.1s; }}
-
-                @keyframes slideUp {{
-                    from {{ transform: translateY(50px); opacity: 0; }}
-                    to {{ transform: translateY(0); opacity: 1; }}
-                }}
-
-                .result-card:hover {{
-                    transform: translateY(-5px);
-                    box-shadow: 0 25px 50px rgba(0, 0, 0, 0.3);
-                }}
-
-                .card-header {{
-                    background: linear-gradient(135deg, #667eea, #764ba2);
-                    color: white;
-                    padding: 1.5rem 2rem;
-                    font-size: 1.3rem;
-                    font-weight: 600;
-                    display: flex;
-                    align-items: center;
-                    gap: 0.75rem;
-                }}
-
-                .card-body {{
-                    padding: 2rem;
-                }}
-
-                .card-body img {{
-                    width: 100%;
-                    height: auto;
-                    border-radius: 12px;
-                    box-shadow: 0 8px 25px rgba(0, 0, 0, 0.1);
-                    margin-bottom: 1.5rem;
-                    transition: transform 0.3s ease;
-                }}
-
-                .card-body img:hover {{
-                    transform: scale(1.02);
-                }}
-
-                .markdown-content {{
-                    font-size: 1rem;
-                    line-height: 1.7;
-                    color: #374151;
-                }}
-
-                .markdown-content h1, .markdown-content h2, .markdown-content h3 {{
-                    color: #1f2937;
-                    margin-bottom: 1rem;
-                    font-weight: 600;
-                }}
-
-                .markdown-content ul {{
-                    margin: 1rem 0;
-                    padding-left: 1.5rem;
-                }}
-
-                .markdown-content li {{
-                    margin-bottom: 0.5rem;
-                }}
-
-                .download-section {{
-                    background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-                    color: white;
-                    text-align: center;
-                    padding: 3rem 2rem;
-                    border-radius: 20px;
-                    margin: 2rem 0;
-                    animation: pulse 2s infinite;
-                }}
-
-                @keyframes pulse {{
-                    0%, 100% {{ transform: scale(1); }}
-                    50% {{ transform: scale(1.02); }}
-                }}
-
-                .download-btn {{
-                    display: inline-block;
-                    background: white;
-                    color: #f5576c;
-                    padding: 1rem 2rem;
-                    border-radius: 12px;
-                    text-decoration: none;
-                    font-weight: 600;
-                    font-size: 1.1rem;
-                    transition: all 0.3s ease;
-                    margin: 1rem 0.5rem;
-                    box-shadow: 0 5px 15px rgba(0, 0, 0, 0.2);
-                }}
-
-                .download-btn:hover {{
-                    transform: translateY(-3px);
-                    box-shadow: 0 10px 25px rgba(0, 0, 0, 0.3);
-                    text-decoration: none;
-                    color: #f5576c;
-                }}
-
-                .back-btn {{
-                    background: rgba(255, 255, 255, 0.2);
-                    color: white;
-                    padding: 1rem 2rem;
-                    border-radius: 12px;
-                    text-decoration: none;
-                    font-weight: 600;
-                    display: inline-block;
-                    backdrop-filter: blur(10px);
-                    border: 1px solid rgba(255, 255, 255, 0.3);
-                    transition: all 0.3s ease;
-                    margin-top: 2rem;
-                }}
-
-                .back-btn:hover {{
-                    background: rgba(255, 255, 255, 0.3);
-                    transform: translateY(-2px);
-                    text-decoration: none;
-                    color: white;
-                }}
-
-                .stats-grid {{
-                    display: grid;
-                    grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                    gap: 1rem;
-                    margin-bottom: 2rem;
-                }}
-
-                .stat-item {{
-                    background: linear-gradient(135deg, #667eea, #764ba2);
-                    color: white;
-                    padding: 1.5rem;
-                    border-radius: 12px;
-                    text-align: center;
-                    animation: fadeInUp 0.8s ease-out;
-                }}
-
-                @keyframes fadeInUp {{
-                    from {{ transform: translateY(30px); opacity: 0; }}
-                    to {{ transform: translateY(0); opacity: 1; }}
-                }}
-
-                .stat-number {{
-                    font-size: 2rem;
-                    font-weight: 800;
-                    display: block;
-                }}
-
-                .stat-label {{
-                    font-size: 0.9rem;
-                    opacity: 0.9;
-                    text-transform: uppercase;
-                    letter-spacing: 1px;
-                }}
-
-                @media (max-width: 768px) {{
-                    .results-container {{
-                        padding: 1rem;
-                    }}
-
-                    .results-header h1 {{
-                        font-size: 2rem;
-                    }}
-
-                    .card-body {{
-                        padding: 1.5rem;
-                    }}
-
-                    .download-section {{
-                        padding: 2rem 1rem;
-                    }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="results-container">
-                <div class="results-header">
-                    <h1><i class="fas fa-chart-line"></i> Analysis Complete!</h1>
-                    <p>Here are your comprehensive sentiment analysis results</p>
-                </div>
-
-                <div class="stats-grid">
-                    <div class="stat-item">
-                        <span class="stat-number">{len(df)}</span>
-                        <span class="stat-label">Total Comments</span>
-                    </div>
-                    <div class="stat-item">
-                        <span class="stat-number">{sentiment_counts.get('positive', 0)}</span>
-                        <span class="stat-label">Positive</span>
-                    </div>
-                    <div class="stat-item">
-                        <span class="stat-number">{sentiment_counts.get('neutral', 0)}</span>
-                        <span class="stat-label">Neutral</span>
-                    </div>
-                    <div class="stat-item">
-                        <span class="stat-number">{sentiment_counts.get('negative', 0)}</span>
-                        <span class="stat-label">Negative</span>
-                    </div>
-                </div>
-
-                <div class="result-card">
-                    <div class="card-header">
-                        <i class="fas fa-chart-bar"></i>
-                        Sentiment Distribution Overview
-                    </div>
-                    <div class="card-body">
-                        <img src="/static/sentiment_distribution.png" alt="Sentiment Distribution Chart">
-                        <p>This chart shows the overall distribution of sentiments across all analyzed comments.</p>
-                    </div>
-                </div>
-        """
-
-        # Add sentiment-specific cards
-        if "positive" in gemini_responses and wordcloud_positive:
-            results_html += f"""
-                <div class="result-card">
-                    <div class="card-header">
-                        <i class="fas fa-smile" style="color: #10b981;"></i>
-                        Positive Sentiment Analysis
-                    </div>
-                    <div class="card-body">
-                        <img src="/static/wordcloud_positive.png" alt="Positive Sentiment Word Cloud">
-                        <div class="markdown-content">
-                            {markdown(gemini_responses["positive"])}
-                        </div>
-                    </div>
-                </div>
-            """
-
-        if "negative" in gemini_responses and wordcloud_negative:
-            results_html += f"""
-                <div class="result-card">
-                    <div class="card-header">
-                        <i class="fas fa-frown" style="color: #ef4444;"></i>
-                        Negative Sentiment Analysis
-                    </div>
-                    <div class="card-body">
-                        <img src="/static/wordcloud_negative.png" alt="Negative Sentiment Word Cloud">
-                        <div class="markdown-content">
-                            {markdown(gemini_responses["negative"])}
-                        </div>
-                    </div>
-                </div>
-            """
-
-        if "neutral" in gemini_responses and wordcloud_neutral:
-            results_html += f"""
-                <div class="result-card">
-                    <div class="card-header">
-                        <i class="fas fa-meh" style="color: #f59e0b;"></i>
-                        Neutral Sentiment Analysis
-                    </div>
-                    <div class="card-body">
-                        <img src="/static/wordcloud_neutral.png" alt="Neutral Sentiment Word Cloud">
-                        <div class="markdown-content">
-                            {markdown(gemini_responses["neutral"])}
-                        </div>
-                    </div>
-                </div>
-            """
-
-        if response_result:
-            results_html += f"""
-                <div class="result-card">
-                    <div class="card-header">
-                        <i class="fas fa-lightbulb"></i>
-                        Executive Summary & Strategic Recommendations
-                    </div>
-                    <div class="card-body">
-                        <div class="markdown-content">
-                            {markdown(response_result)}
-                        </div>
-                    </div>
-                </div>
-            """
-
-        results_html += f"""
-                <div class="download-section">
-                    <h2><i class="fas fa-download"></i> Download Your Report</h2>
-                    <p>Get a comprehensive PDF report with all insights and recommendations</p>
-                    <a href="/static/sentiment_analysis_report.pdf" class="download-btn" target="_blank">
-                        <i class="fas fa-file-pdf"></i> Download PDF Report
-                    </a>
-                </div>
-
-                <div style="text-align: center;">
-                    <a href="/" class="back-btn">
-                        <i class="fas fa-arrow-left"></i> Analyze Another Video
-                    </a>
-                </div>
-            </div>
-
-            <script>
-                // Add smooth scrolling and animations
-                document.addEventListener('DOMContentLoaded', function() {{
-                    // Stagger card animations
-                    const cards = document.querySelectorAll('.result-card');
-                    cards.forEach((card, index) => {{
-                        card.style.animationDelay = (index * 0.1) + 's';
-                    }});
-
-                    // Add click-to-zoom for images
-                    const images = document.querySelectorAll('.card-body img');
-                    images.forEach(img => {{
-                        img.addEventListener('click', function() {{
-                            if (this.style.position === 'fixed') {{
-                                // Close zoom
-                                this.style.position = '';
-                                this.style.top = '';
-                                this.style.left = '';
-                                this.style.width = '';
-                                this.style.height = '';
-                                this.style.zIndex = '';
-                                this.style.cursor = '';
-                                document.body.style.overflow = '';
-                            }} else {{
-                                // Open zoom
-                                this.style.position = 'fixed';
-                                this.style.top = '50%';
-                                this.style.left = '50%';
-                                this.style.width = '90%';
-                                this.style.height = 'auto';
-                                this.style.transform = 'translate(-50%, -50%)';
-                                this.style.zIndex = '1000';
-                                this.style.cursor = 'zoom-out';
-                                document.body.style.overflow = 'hidden';
-                            }}
-                        }});
-                    }});
-                }});
-            </script>
-        </body>
-        </html>
-        """
-
-        logger.info("Analysis completed successfully")
-        return results_html
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error in analyze_youtube: {str(e)}")
-        logger.error(traceback.format_exc())
-        
-        # Return a friendly error page
-        return f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Analysis Error</title>
-            <link href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css" rel="stylesheet">
-            <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap" rel="stylesheet">
-            <style>
-                body {{
-                    font-family: 'Inter', sans-serif;
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    min-height: 100vh;
-                    display: flex;
-                    justify-content: center;
-                    align-items: center;
-                    margin: 0;
-                }}
-                .error-container {{
-                    background: white;
-                    padding: 3rem;
-                    border-radius: 24px;
-                    text-align: center;
-                    box-shadow: 0 20px 60px rgba(0,0,0,0.2);
-                    max-width: 600px;
-                    animation: slideIn 0.5s ease-out;
-                }}
-                @keyframes slideIn {{
-                    from {{ transform: translateY(50px); opacity: 0; }}
-                    to {{ transform: translateY(0); opacity: 1; }}
-                }}
-                .error-icon {{
-                    font-size: 4rem;
-                    color: #ef4444;
-                    margin-bottom: 1.5rem;
-                    animation: shake 1s infinite;
-                }}
-                @keyframes shake {{
-                    0%, 100% {{ transform: translateX(0); }}
-                    25% {{ transform: translateX(-5px); }}
-                    75% {{ transform: translateX(5px); }}
-                }}
-                .error-title {{
-                    color: #dc2626;
-                    font-size: 1.8rem;
-                    font-weight: 700;
-                    margin-bottom: 1rem;
-                }}
-                .error-message {{
-                    color: #6b7280;
-                    margin-bottom: 2rem;
-                    line-height: 1.6;
-                }}
-                .btn-back {{
-                    background: linear-gradient(135deg, #667eea, #764ba2);
-                    color: white;
-                    padding: 1rem 2rem;
-                    text-decoration: none;
-                    border-radius: 12px;
-                    display: inline-block;
-                    transition: all 0.3s ease;
-                    font-weight: 600;
-                }}
-                .btn-back:hover {{
-                    transform: translateY(-2px);
-                    box-shadow: 0 10px 25px rgba(102, 126, 234, 0.4);
-                    text-decoration: none;
-                    color: white;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="error-container">
-                <div class="error-icon">
-                    <i class="fas fa-exclamation-circle"></i>
-                </div>
-                <h2 class="error-title">Processing Error</h2>
-                <p class="error-message">
-                    We encountered an error while processing your request. This could be due to:
-                    <br>• Network connectivity issues
-                    <br>• High server load
-                    <br>• Invalid video URL format
-                    <br>• Temporary service disruption
-                    <br><br>
-                    <strong>Error:</strong> {str(e)[:200]}...
-                </p>
-                <a href="/" class="btn-back">
-                    <i class="fas fa-arrow-left"></i> Try Again
-                </a>
-            </div>
-        </body>
-        </html>
-        """
-
-# Add error handler for development
-@app.exception_handler(500)
-async def internal_error_handler(request, exc):
-    logger.error(f"Internal server error: {exc}")
-    return HTMLResponse(
-        content="""
-        <html>
-            <body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
-                <h1 style="color: #dc2626;">Internal Server Error</h1>
-                <p>Something went wrong on our end. Please try again later.</p>
-                <a href="/" style="background: #667eea; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">Go Home</a>
-            </body>
-        </html>
-        """,
-        status_code=500
-    )
-
-if __name__ == "__main__":
-    import uvicorn
-
-    uvicorn.run(
-        app,
-        host="127.0.0.1",
-        port=9000,
-        timeout_keep_alive=600,
-        log_level="info",
-        access_log=True,
-    )
\ No newline at end of file
+import time
+_MODULE_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, Request, Form, HTTPException
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, RedirectResponse, Response, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel
+import numpy as np
+import os
+import io
+import hashlib
+import zlib
+import shutil
+import math
+import mimetypes
+import tempfile
+import json
+import re
+import sqlite3
+import logging
+from PIL import Image
+from markdown import markdown
+from markupsafe import Markup
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from itertools import islice
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import concurrent.futures
+import multiprocessing
+import asyncio
+import threading
+import uuid
+import random
+import importlib
+import sys
+import gzip
+import inspect
+import traceback
+from typing import List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class StartupReport:
+    """Where cold-start time goes: heavy imports, model load and warm-up, per component"""
+
+    def __init__(self):
+        self.components = {}
+        self.module_import_seconds = None
+        self.server_ready_seconds = None
+        self.warmup_seconds = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.components[name] = round(time.perf_counter() - started, 3)
+
+    def since_start(self) -> float:
+        return round(time.perf_counter() - _MODULE_STARTED, 3)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            components = dict(self.components)
+        return {
+            "module_import_seconds": self.module_import_seconds,
+            "server_ready_seconds": self.server_ready_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "warm": self.warmup_seconds is not None,
+            "components": components,
+        }
+
+
+startup_report = StartupReport()
+
+
+def lazy_import(name: str):
+    """Import a heavy module on first use and record how long it took"""
+    module = sys.modules.get(name)
+    if module is None:
+        with startup_report.measure(f"import {name}"):
+            module = importlib.import_module(name)
+    elif getattr(getattr(module, "__spec__", None), "_initializing", False):
+        # The warm-up thread is still importing it; import_module waits for that to finish
+        module = importlib.import_module(name)
+    return module
+
+
+class LazyModule:
+    """Stand-in for a heavy module that is only imported when an attribute is first used"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = lazy_import(self._name)
+        return getattr(self._module, attr)
+
+
+# Heavy dependencies stay unimported until used, so the server binds (and spawned CPU
+# workers start) without paying for them; the startup warm-up loads them in the background
+pl = LazyModule("polars")
+genai = LazyModule("google.generativeai")
+transformers = LazyModule("transformers")
+huggingface_hub = LazyModule("huggingface_hub")
+wordcloud = LazyModule("wordcloud")
+youtube_comment_downloader = LazyModule("youtube_comment_downloader")
+fpdf = LazyModule("fpdf")
+
+# Constants
+GEMINI_MODEL = "gemini-2.0-flash"
+SENTIMENT_MODEL = "mdhugol/indonesia-bert-sentiment-classification"
+SENTIMENT_LABELS = {
+    "LABEL_0": "positive",
+    "LABEL_1": "neutral",
+    "LABEL_2": "negative",
+}
+SENTIMENT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "32"))
+# "torch" runs the transformers pipeline; "onnx" runs an int8-quantized export through ONNX Runtime
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "torch").lower()
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", "cache/onnx")
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", str(os.cpu_count() or 1)))
+PARITY_SAMPLE_TEXTS = [
+    "video ini bagus sekali",
+    "mantap keren banget",
+    "jelek banget kecewa",
+    "biasa saja",
+    "terima kasih atas informasinya",
+    "pelayanannya buruk dan lambat",
+    "saya suka sekali produk ini",
+    "tidak sesuai harapan",
+    "lumayan lah untuk harga segini",
+    "kapan upload video baru",
+    "sangat membantu terima kasih",
+    "parah sih ini penipuan",
+]
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+IO_WORKERS = int(os.getenv("IO_WORKERS", "16"))
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "4"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+ARTIFACT_ROOT = os.getenv("ARTIFACT_ROOT", "artifacts")
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.getenv("TEMPLATE_DIR", os.path.join(APP_DIR, "templates"))
+STATIC_DIR = os.getenv("STATIC_DIR", os.path.join(APP_DIR, "static"))
+# CSS and JS from STATIC_DIR/css and STATIC_DIR/js are served here under content-hashed names
+ASSET_PREFIX = "/assets"
+# Default number of comments per video; 0 means every comment
+COMMENT_LIMIT = int(os.getenv("COMMENT_LIMIT", "1000"))
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "128"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "8"))
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", "cache/results")
+RESULT_CACHE_TTL_SECONDS = int(os.getenv("RESULT_CACHE_TTL_SECONDS", str(6 * 3600)))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(1024 ** 3)))
+COMMENT_CACHE_PATH = os.getenv("COMMENT_CACHE_PATH", "cache/comment_sentiment.sqlite3")
+COMMENT_CACHE_MAX_ROWS = int(os.getenv("COMMENT_CACHE_MAX_ROWS", "2000000"))
+VIDEO_STATE_PATH = os.getenv("VIDEO_STATE_PATH", "cache/video_state.sqlite3")
+# Newest-first refreshes stop after this many already-seen comments in a row
+# (a single seen one isn't enough: pinned comments sit on top regardless of date)
+INCREMENTAL_STOP_AFTER_SEEN = int(os.getenv("INCREMENTAL_STOP_AFTER_SEEN", "20"))
+# Comments whose estimated Jaccard similarity (character shingles, MinHash/LSH) reaches this
+# share one model call; 0 collapses exact duplicates only
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.85"))
+NEAR_DUP_PERMUTATIONS = int(os.getenv("NEAR_DUP_PERMUTATIONS", "64"))
+NEAR_DUP_BANDS = int(os.getenv("NEAR_DUP_BANDS", "16"))
+# Shorter comments are only collapsed when identical; a few shingles can't tell "bagus" from "tidak bagus"
+NEAR_DUP_MIN_CHARS = int(os.getenv("NEAR_DUP_MIN_CHARS", "24"))
+# Groups (and exact-text keys) the dedup index remembers; the least recently seen are forgotten
+NEAR_DUP_MAX_GROUPS = int(os.getenv("NEAR_DUP_MAX_GROUPS", "10000"))
+BATCH_MAX_VIDEOS = int(os.getenv("BATCH_MAX_VIDEOS", "200"))
+BATCH_DOWNLOAD_CONCURRENCY = int(os.getenv("BATCH_DOWNLOAD_CONCURRENCY", "4"))
+# Tokens per sentiment kept in the frequency tables behind word clouds, insights, PDF and JSON
+FREQUENCY_TABLE_SIZE = int(os.getenv("FREQUENCY_TABLE_SIZE", "150"))
+# Word clouds are laid out once on a small canvas; the web preview and the PDF copy are
+# redrawn from that layout instead of placing every word again
+WORDCLOUD_LAYOUT_SIZE = (600, 300)
+WORDCLOUD_PREVIEW_SCALE = float(os.getenv("WORDCLOUD_PREVIEW_SCALE", "1.5"))
+# The web page gets the chart as SVG; only the PDF needs a raster copy
+CHART_FIGSIZE = (12, 8)
+# PDF images are drawn at their printed size and this resolution, then embedded as a
+# 256-colour palette with Flate ("flate") or as JPEG ("jpeg", at REPORT_JPEG_QUALITY)
+REPORT_IMAGE_DPI = int(os.getenv("REPORT_IMAGE_DPI", "150"))
+REPORT_IMAGE_FORMAT = os.getenv("REPORT_IMAGE_FORMAT", "flate").lower()
+REPORT_JPEG_QUALITY = int(os.getenv("REPORT_JPEG_QUALITY", "80"))
+REPORT_IMAGE_WIDTH_MM = 190
+SENTIMENT_COLORS = {"positive": "#10B981", "neutral": "#F59E0B", "negative": "#EF4444"}
+# Removed from every analysis while cleaning comments, on top of the user's own stopwords
+DEFAULT_STOPWORDS = ["the", "of", "is", "a", "in", "https", "yg", "gua", "gue", "lo", "lu", "gw"]
+# Gemini calls: per-attempt timeout, attempts per call, and retries shared by one job's calls
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "30"))
+GEMINI_MAX_ATTEMPTS = int(os.getenv("GEMINI_MAX_ATTEMPTS", "3"))
+GEMINI_RETRY_BUDGET = int(os.getenv("GEMINI_RETRY_BUDGET", "4"))
+GEMINI_BACKOFF_SECONDS = float(os.getenv("GEMINI_BACKOFF_SECONDS", "0.5"))
+INSIGHTS_CACHE_DIR = os.getenv("INSIGHTS_CACHE_DIR", "cache/insights")
+INSIGHTS_CACHE_TTL_SECONDS = int(os.getenv("INSIGHTS_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+INSIGHTS_CACHE_MAX_BYTES = int(os.getenv("INSIGHTS_CACHE_MAX_BYTES", str(64 * 1024 ** 2)))
+# PDF reports are built on first download and kept here, keyed by the job's report inputs
+REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", "cache/reports")
+REPORT_CACHE_TTL_SECONDS = int(os.getenv("REPORT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(256 * 1024 ** 2)))
+# host:port of a plaintext gRPC endpoint (e.g. benchmarks/fake_gemini.py) instead of the real API
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+# Imported in the background after the server binds, in this process and in each CPU worker
+WARMUP_IMPORTS = ["youtube_comment_downloader", "polars", "wordcloud", "google.generativeai"]
+CPU_WORKER_IMPORTS = ["polars", "wordcloud", "matplotlib.figure", "fpdf"]
+# The PDF is not a stage: it is built on demand by GET /jobs/{id}/report.pdf
+ANALYSIS_STAGES = ["download", "clean", "infer", "plot", "wordcloud", "insights"]
+STAGE_TITLES = {
+    "download": "Downloading comments",
+    "clean": "Cleaning text",
+    "infer": "Scoring sentiment",
+    "plot": "Drawing the chart",
+    "wordcloud": "Drawing word clouds",
+    "insights": "Generating insights",
+}
+# Comment lines sent on an idle /jobs/{id}/events stream so proxies don't drop it
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+API_KEY = os.getenv("GEMINI_API_KEY")
+HF_TOKEN = os.getenv("HF_API_TOKEN")
+
+
+class OnnxSentimentPipeline:
+    """Callable stand-in for the transformers sentiment pipeline, backed by ONNX Runtime"""
+
+    def __init__(self, session, tokenizer, id2label: dict, max_length: int = 512):
+        self.session = session
+        self.tokenizer = tokenizer
+        self.id2label = id2label
+        self.max_length = max_length
+        self.input_names = [node.name for node in session.get_inputs()]
+
+    def __call__(self, texts, batch_size=None, truncation=True, **kwargs):
+        if isinstance(texts, str):
+            texts = [texts]
+        texts = list(texts)
+        batch_size = batch_size or len(texts) or 1
+        results = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=truncation,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+            logits = self.session.run(None, feeds)[0]
+            # Softmax, shifted for numerical stability
+            probabilities = np.exp(logits - logits.max(axis=1, keepdims=True))
+            probabilities /= probabilities.sum(axis=1, keepdims=True)
+            best = probabilities.argmax(axis=1)
+            results.extend(
+                {"label": self.id2label[int(i)], "score": float(probabilities[row, i])}
+                for row, i in enumerate(best)
+            )
+        return results
+
+
+def export_quantized_onnx(model_name: str, tokenizer, onnx_path: str):
+    """Export a sequence classifier to ONNX and store a dynamically int8-quantized copy at onnx_path"""
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    model = transformers.AutoModelForSequenceClassification.from_pretrained(model_name, token=HF_TOKEN).eval()
+    sample = tokenizer(["video ini bagus sekali"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+    export_kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # The TorchScript exporter handles dynamic_axes without the extra onnxscript dependency
+        export_kwargs["dynamo"] = False
+
+    cache_dir = os.path.dirname(onnx_path) or "."
+    os.makedirs(cache_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp_dir:
+        fp32_path = os.path.join(tmp_dir, "model.onnx")
+        int8_path = os.path.join(tmp_dir, "model-int8.onnx")
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                fp32_path,
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=17,
+                **export_kwargs,
+            )
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        os.replace(int8_path, onnx_path)
+    logger.info(f"Exported int8 ONNX model to {onnx_path}")
+
+
+def load_onnx_pipeline(model_name: str, cache_dir: str = ONNX_CACHE_DIR,
+                       intra_op_threads: int = ONNX_INTRA_OP_THREADS) -> OnnxSentimentPipeline:
+    """Int8 ONNX Runtime pipeline for model_name, exported and cached on disk on first use"""
+    import onnxruntime as ort
+
+    tokenizer = transformers.AutoTokenizer.from_pretrained(model_name, token=HF_TOKEN)
+    config = transformers.AutoConfig.from_pretrained(model_name, token=HF_TOKEN)
+    onnx_path = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name) + "-int8.onnx")
+    if not os.path.exists(onnx_path):
+        export_quantized_onnx(model_name, tokenizer, onnx_path)
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = intra_op_threads
+    # Requests are already serialized on the inference thread; parallelism comes from intra-op
+    options.inter_op_num_threads = 1
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+    return OnnxSentimentPipeline(session, tokenizer, config.id2label)
+
+
+class SentimentModelRegistry:
+    """Process-wide holder for the sentiment pipeline, loaded once and reused by every request"""
+
+    def __init__(self, model_name: str, label_index: dict, backend: str = "torch"):
+        self.model_name = model_name
+        self.label_index = label_index
+        self.backend = backend
+        self.active_backend = None
+        self.pipeline = None
+        self.error = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.pipeline is not None
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the scores this pipeline produces; int8 scores differ slightly from fp32"""
+        return f"{self.model_name}:{self.active_backend or self.backend}"
+
+    def _build_torch_pipeline(self):
+        model = transformers.AutoModelForSequenceClassification.from_pretrained(
+            self.model_name, token=HF_TOKEN
+        )
+        tokenizer = transformers.AutoTokenizer.from_pretrained(self.model_name, token=HF_TOKEN)
+        return transformers.pipeline(
+            "sentiment-analysis", model=model, tokenizer=tokenizer
+        )
+
+    def load(self):
+        """Load and warm the pipeline; safe to call repeatedly and from several threads"""
+        with self._lock:
+            if self.pipeline is not None:
+                return self.pipeline
+
+            try:
+                if HF_TOKEN:
+                    huggingface_hub.login(HF_TOKEN)
+                    logger.info("Successfully logged into Hugging Face")
+
+                sentiment_analysis = None
+                with startup_report.measure("sentiment model load"):
+                    if self.backend == "onnx":
+                        try:
+                            sentiment_analysis = load_onnx_pipeline(self.model_name)
+                            self.active_backend = "onnx"
+                        except Exception as e:
+                            logger.warning(f"ONNX backend unavailable, falling back to PyTorch: {e}")
+                    if sentiment_analysis is None:
+                        sentiment_analysis = self._build_torch_pipeline()
+                        self.active_backend = "torch"
+
+                # Warm up with a dummy batch so the first real request doesn't pay for lazy init
+                with startup_report.measure("sentiment model warm-up"):
+                    sentiment_analysis(["video ini bagus sekali", "jelek"], truncation=True)
+            except Exception as e:
+                self.error = str(e)
+                logger.error(f"Error loading sentiment model: {e}")
+                raise
+
+            self.pipeline = sentiment_analysis
+            self.error = None
+            logger.info(
+                f"Sentiment analysis model {self.model_name} ({self.active_backend}) loaded and warmed up"
+            )
+            return self.pipeline
+
+    def check_parity(self, texts=None) -> dict:
+        """Label agreement between the active backend and the PyTorch reference on sample texts"""
+        texts = list(texts or PARITY_SAMPLE_TEXTS)
+        candidate = self.load()
+        reference = candidate if self.active_backend == "torch" else self._build_torch_pipeline()
+
+        started = time.perf_counter()
+        reference_results = reference(texts, batch_size=SENTIMENT_BATCH_SIZE, truncation=True)
+        reference_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        candidate_results = candidate(texts, batch_size=SENTIMENT_BATCH_SIZE, truncation=True)
+        candidate_seconds = time.perf_counter() - started
+
+        mismatches = [
+            {"text": text, "reference": ref["label"], "backend": cand["label"]}
+            for text, ref, cand in zip(texts, reference_results, candidate_results)
+            if ref["label"] != cand["label"]
+        ]
+        score_gaps = [
+            abs(ref["score"] - cand["score"])
+            for ref, cand in zip(reference_results, candidate_results)
+            if ref["label"] == cand["label"]
+        ]
+        return {
+            "backend": self.active_backend,
+            "samples": len(texts),
+            "label_agreement": round(1 - len(mismatches) / len(texts), 4) if texts else 1.0,
+            "max_score_difference": round(max(score_gaps), 4) if score_gaps else 0.0,
+            "reference_seconds": round(reference_seconds, 4),
+            "backend_seconds": round(candidate_seconds, 4),
+            "mismatches": mismatches[:20],
+        }
+
+
+sentiment_models = SentimentModelRegistry(SENTIMENT_MODEL, SENTIMENT_LABELS, SENTIMENT_BACKEND)
+
+
+class WorkerPools:
+    """Bounded executors that keep CPU-heavy and blocking I/O stages off the event loop"""
+
+    def __init__(self, cpu_workers: int, io_workers: int):
+        self.cpu_workers = cpu_workers
+        self.io_workers = io_workers
+        self.process_pool = None
+        self.io_pool = None
+        self.inference_pool = None
+
+    def start(self):
+        # spawn, not fork: the model warm-up thread may already be running torch
+        self.process_pool = ProcessPoolExecutor(
+            max_workers=self.cpu_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self.io_pool = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="io")
+        # The model lives in this process; torch releases the GIL and already uses
+        # intra-op threads, so one inference thread avoids oversubscribing the CPU
+        self.inference_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+
+    def shutdown(self):
+        for pool in (self.process_pool, self.io_pool, self.inference_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self.process_pool = self.io_pool = self.inference_pool = None
+
+    async def run_cpu(self, func, *args):
+        """Run a picklable, CPU-bound function in the process pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.process_pool, func, *args)
+
+    async def run_io(self, func, *args):
+        """Run a blocking I/O function in the thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.io_pool, func, *args)
+
+    async def run_inference(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.inference_pool, func, *args)
+
+
+pools = WorkerPools(CPU_WORKERS, IO_WORKERS)
+
+
+def write_file_atomic(path: str, data: bytes):
+    """Write bytes via a temp file in the same directory and rename it into place"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+class ArtifactStore:
+    """Per-job artifact directories with content-addressed, write-once file names"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.root, job_id)
+
+    @staticmethod
+    def stored_name(name: str, data: bytes) -> str:
+        """Content-addressed file name for `data`, e.g. wordcloud_positive.<sha256>.png"""
+        stem, ext = os.path.splitext(name)
+        return f"{stem}.{hashlib.sha256(data).hexdigest()[:16]}{ext}"
+
+    def put(self, job_id: str, name: str, data: bytes) -> str:
+        """Store `data` under its content-addressed name and return its path"""
+        path = os.path.join(self.job_dir(job_id), self.stored_name(name, data))
+        # Same name means same bytes, so an existing file never needs rewriting
+        if not os.path.exists(path):
+            write_file_atomic(path, data)
+        return path
+
+    def link(self, job_id: str, source_path: str) -> str:
+        """Hard-link (or copy) an already content-addressed file into a job's namespace"""
+        path = os.path.join(self.job_dir(job_id), os.path.basename(source_path))
+        if not os.path.exists(path):
+            os.makedirs(self.job_dir(job_id), exist_ok=True)
+            try:
+                os.link(source_path, path)
+            except OSError:
+                with open(source_path, "rb") as f:
+                    write_file_atomic(path, f.read())
+        return path
+
+    def resolve(self, job_id: str, filename: str):
+        """Path of a stored file, or None for unknown or unsafe names"""
+        if not filename or filename != os.path.basename(filename) or filename.startswith("."):
+            return None
+        path = os.path.join(self.job_dir(job_id), filename)
+        return path if os.path.isfile(path) else None
+
+    def remove(self, job_id: str):
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+
+artifact_store = ArtifactStore(ARTIFACT_ROOT)
+
+
+class DiskCache:
+    """Directory-per-entry disk cache with a TTL and size-bounded LRU eviction.
+
+    The total size is tracked as entries are written, so a put only scans the whole
+    cache when it pushes the total over max_bytes or the periodic expiry sweep is due.
+    """
+
+    META_FILE = "meta.json"
+    # Expired entries are never served, so removing them from disk can wait for a sweep
+    SWEEP_INTERVAL_SECONDS = 600
+    # Eviction trims below max_bytes so the next few puts don't each trigger a scan
+    EVICT_TO_FRACTION = 0.9
+
+    def __init__(self, root: str, ttl_seconds: int, max_bytes: int):
+        self.root = root
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Unknown until the first full scan
+        self._total_bytes = None
+        self._last_sweep = 0.0
+        os.makedirs(root, exist_ok=True)
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    @staticmethod
+    def _dir_size(entry_dir: str) -> int:
+        try:
+            return sum(os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+        except OSError:
+            return 0
+
+    def get(self, key: str):
+        """Return (entry_dir, meta) for a live entry, refreshing its LRU position"""
+        meta_path = os.path.join(self._entry_dir(key), self.META_FILE)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if time.time() - meta.get("created_at", 0) > self.ttl_seconds:
+            self.misses += 1
+            return None
+        try:
+            # meta.json's mtime doubles as the last-access time for LRU eviction
+            os.utime(meta_path)
+        except OSError:
+            pass
+        self.hits += 1
+        return self._entry_dir(key), meta
+
+    def put(self, key: str, meta: dict, files: dict) -> str:
+        """Store files (name -> bytes, or name -> path to copy) atomically under key"""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=self.root, prefix=".tmp-")
+        try:
+            for name, content in files.items():
+                target = os.path.join(tmp_dir, name)
+                if isinstance(content, (bytes, bytearray)):
+                    with open(target, "wb") as f:
+                        f.write(content)
+                else:
+                    shutil.copyfile(content, target)
+            meta = dict(meta, created_at=time.time())
+            with open(os.path.join(tmp_dir, self.META_FILE), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+
+            size = self._dir_size(tmp_dir)
+            entry_dir = self._entry_dir(key)
+            with self._lock:
+                replaced = self._dir_size(entry_dir) if os.path.isdir(entry_dir) else 0
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                os.replace(tmp_dir, entry_dir)
+                if self._total_bytes is not None:
+                    self._total_bytes += size - replaced
+                needs_scan = (
+                    self._total_bytes is None
+                    or self._total_bytes > self.max_bytes
+                    or time.time() - self._last_sweep > self.SWEEP_INTERVAL_SECONDS
+                )
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        if needs_scan:
+            self.evict()
+        return entry_dir
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until comfortably under max_bytes"""
+        with self._lock:
+            entries = []
+            now = time.time()
+            for key in os.listdir(self.root):
+                entry_dir = self._entry_dir(key)
+                meta_path = os.path.join(entry_dir, self.META_FILE)
+                if key.startswith(".") or not os.path.isfile(meta_path):
+                    continue
+                try:
+                    last_used = os.path.getmtime(meta_path)
+                    size = sum(
+                        os.path.getsize(os.path.join(entry_dir, name))
+                        for name in os.listdir(entry_dir)
+                    )
+                except OSError:
+                    continue
+                if now - last_used > self.ttl_seconds:
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                    continue
+                entries.append((last_used, size, entry_dir))
+
+            total = sum(size for _, size, _ in entries)
+            if total > self.max_bytes:
+                target = self.max_bytes * self.EVICT_TO_FRACTION
+                for _, size, entry_dir in sorted(entries):
+                    if total <= target:
+                        break
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                    total -= size
+            self._total_bytes = total
+            self._last_sweep = now
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+result_cache = DiskCache(RESULT_CACHE_DIR, RESULT_CACHE_TTL_SECONDS, RESULT_CACHE_MAX_BYTES)
+insights_cache = DiskCache(INSIGHTS_CACHE_DIR, INSIGHTS_CACHE_TTL_SECONDS, INSIGHTS_CACHE_MAX_BYTES)
+report_cache = DiskCache(REPORT_CACHE_DIR, REPORT_CACHE_TTL_SECONDS, REPORT_CACHE_MAX_BYTES)
+
+
+class CommentSentimentCache:
+    """SQLite store mapping a hash of (model, cleaned comment) to its label and score"""
+
+    def __init__(self, path: str, max_rows: int):
+        self.path = path
+        self.max_rows = max_rows
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS comment_sentiment ("
+                "key TEXT PRIMARY KEY, label TEXT NOT NULL, score REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS comment_sentiment_last_used ON comment_sentiment (last_used)"
+            )
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def make_key(text: str, model_id: str) -> str:
+        normalized = " ".join(str(text).split())
+        return hashlib.sha1(f"{model_id}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys) -> dict:
+        """Look up many keys at once; returns key -> (label, score) for the hits"""
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, label, score FROM comment_sentiment WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                found.update((key, (label, score)) for key, label, score in rows)
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE comment_sentiment SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                conn.commit()
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store (key, label, score) triples, evicting least recently used rows past max_rows"""
+        now = time.time()
+        rows = [(key, label, float(score), now) for key, label, score in items]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO comment_sentiment (key, label, score, last_used) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            count = conn.execute("SELECT COUNT(*) FROM comment_sentiment").fetchone()[0]
+            if count > self.max_rows:
+                # Trim to 90% so eviction doesn't run again on the very next insert
+                conn.execute(
+                    "DELETE FROM comment_sentiment WHERE key IN ("
+                    "SELECT key FROM comment_sentiment ORDER BY last_used LIMIT ?)",
+                    (count - int(self.max_rows * 0.9),),
+                )
+            conn.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        with self._lock:
+            rows = self._connect().execute("SELECT COUNT(*) FROM comment_sentiment").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "rows": rows,
+            "max_rows": self.max_rows,
+        }
+
+
+comment_cache = CommentSentimentCache(COMMENT_CACHE_PATH, COMMENT_CACHE_MAX_ROWS)
+
+
+class VideoStateStore:
+    """SQLite record of which comments of a video were already scored, plus its running aggregate"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS video_comments ("
+                "state_key TEXT NOT NULL, comment_id TEXT NOT NULL, label TEXT NOT NULL, score REAL NOT NULL, "
+                "PRIMARY KEY (state_key, comment_id))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS video_aggregates ("
+                "state_key TEXT PRIMARY KEY, video_id TEXT NOT NULL, aggregate TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def has_seen(self, state_key: str, comment_id: str) -> bool:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT 1 FROM video_comments WHERE state_key = ? AND comment_id = ?",
+                (state_key, comment_id),
+            ).fetchone()
+        return row is not None
+
+    def load_aggregate(self, state_key: str):
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT aggregate FROM video_aggregates WHERE state_key = ?", (state_key,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_run(self, state_key: str, video_id: str, scored, aggregate: dict, dropped=()):
+        """Mark a run's (comment_id, label, score) rows as seen and store its aggregate.
+
+        Both go in one transaction, so a run that fails partway leaves no comment marked
+        as seen without it also being counted in the stored aggregate. `dropped` IDs
+        (comments cleaning filtered out) are marked as seen with the label "dropped".
+        """
+        rows = [(state_key, str(comment_id), str(label), float(score)) for comment_id, label, score in scored]
+        rows += [(state_key, str(comment_id), "dropped", 0.0) for comment_id in dropped]
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO video_comments (state_key, comment_id, label, score) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO video_aggregates (state_key, video_id, aggregate, updated_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (state_key, video_id, json.dumps(aggregate), time.time()),
+                )
+
+
+video_state = VideoStateStore(VIDEO_STATE_PATH)
+_video_state_locks = {}
+
+
+@asynccontextmanager
+async def video_state_lock(state_key):
+    """Run monitor refreshes of one video one at a time so they don't overwrite each other's aggregate"""
+    if state_key is None:
+        yield
+        return
+    entry = _video_state_locks.setdefault(state_key, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            _video_state_locks.pop(state_key, None)
+
+
+def extract_video_id(youtube_url: str) -> str:
+    """Normalize the many YouTube URL shapes (watch, youtu.be, shorts, embed, live) to the video ID"""
+    match = re.search(r"(?:[?&]v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})", youtube_url)
+    return match.group(1) if match else youtube_url.strip()
+
+
+def parse_stopwords(custom_stopwords: str) -> list:
+    return [word.strip() for word in custom_stopwords.split(",") if word.strip()]
+
+
+def build_stopwords(custom_stopwords: str) -> list:
+    """DEFAULT_STOPWORDS plus the comma-separated custom ones of a request"""
+    return DEFAULT_STOPWORDS + parse_stopwords(custom_stopwords)
+
+
+def video_state_key(params: dict) -> str:
+    """Incremental state is only reusable for the same video, stopwords and model"""
+    key_fields = {
+        "video_id": extract_video_id(params["youtube_url"]),
+        "stopwords": sorted({word.lower() for word in parse_stopwords(params["custom_stopwords"])}),
+        "sentiment_model": SENTIMENT_MODEL,
+        "sentiment_backend": SENTIMENT_BACKEND,
+    }
+    return hashlib.sha256(json.dumps(key_fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def result_cache_key(params: dict) -> str:
+    """Hash of everything that changes an analysis result"""
+    key_fields = {
+        "video_id": extract_video_id(params["youtube_url"]),
+        "stopwords": sorted({word.lower() for word in parse_stopwords(params["custom_stopwords"])}),
+        "question": params["custom_question"].strip(),
+        "sentiment_model": SENTIMENT_MODEL,
+        "sentiment_backend": SENTIMENT_BACKEND,
+        "gemini_model": GEMINI_MODEL,
+        "comment_limit": params["comment_limit"],
+        "near_dup_threshold": NEAR_DUP_THRESHOLD,
+    }
+    return hashlib.sha256(json.dumps(key_fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class AnalysisJob:
+    """One queued /analyze request and its per-stage progress"""
+
+    def __init__(self, params: dict):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = "queued"
+        self.stages = {name: "pending" for name in ANALYSIS_STAGES}
+        self.stage_seconds = {}
+        self.current_stage = None
+        self.artifacts = {}
+        # Outputs produced but not written yet: stored file name -> (name, bytes)
+        self.outputs = {}
+        # (event, data) pairs for /jobs/{id}/events, in the order they happened
+        self.events = []
+        self._new_event = None
+        self.comments = {"downloaded": 0, "cleaned": 0, "scored": 0, "unique": 0}
+        self.aggregate = None
+        self.frequencies = None
+        # Everything the PDF report is drawn from, kept so it can be built on request
+        self.report = None
+        self.result_html = None
+        self.error = None
+        self.cached = False
+        # Set when a stage fell back to placeholder output (Gemini or inference errors)
+        self.degraded = False
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def add_output(self, name: str, data: bytes) -> str:
+        """Hold a stage's output in memory until the job persists it; returns its URL.
+
+        The URL already carries the content-addressed name the file will be stored
+        under, so it stays valid once the output is written.
+        """
+        filename = artifact_store.stored_name(name, data)
+        self.outputs[filename] = (name, data)
+        return f"/jobs/{self.id}/artifacts/{filename}"
+
+    def write_outputs(self) -> dict:
+        """Write every in-memory output of a finished pipeline in one go; returns name -> stored path.
+
+        Runs on an I/O thread while status polls read the job, so the caller records the
+        paths in `artifacts` back on the event loop.
+        """
+        return {name: artifact_store.put(self.id, name, data) for name, data in self.outputs.values()}
+
+    def publish(self, event: str, data: dict):
+        """Record a progress event and wake /jobs/{id}/events streams waiting for one"""
+        self.events.append((event, data))
+        if self._new_event is not None:
+            self._new_event.set()
+            self._new_event = None
+
+    async def wait_for_event(self, seen: int):
+        """Return once more than `seen` events have been published"""
+        if len(self.events) > seen:
+            return
+        if self._new_event is None:
+            self._new_event = asyncio.Event()
+        await self._new_event.wait()
+
+    def artifact_urls(self) -> dict:
+        """Links relative to /jobs/{id}/results, so the page never names another job's files"""
+        return {name: f"artifacts/{os.path.basename(path)}" for name, path in self.artifacts.items()}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mark a pipeline stage as running for the duration of the block"""
+        self.current_stage = name
+        self.stages[name] = "running"
+        self.publish("stage", {"name": name, "state": "running"})
+        started = time.perf_counter()
+        try:
+            yield
+        except asyncio.CancelledError:
+            self.stages[name] = "cancelled"
+            raise
+        except BaseException:
+            self.stages[name] = "failed"
+            raise
+        finally:
+            self.stage_seconds[name] = round(time.perf_counter() - started, 3)
+            if self.stages[name] != "running":
+                self.publish("stage", {"name": name, "state": self.stages[name]})
+        self.stages[name] = "done"
+        self.publish("stage", {"name": name, "state": "done"})
+
+    def to_dict(self) -> dict:
+        done = sum(1 for state in self.stages.values() if state == "done")
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "current_stage": self.current_stage,
+            "stages": self.stages,
+            "stage_seconds": self.stage_seconds,
+            "progress": round(done / len(self.stages), 2),
+            "comments": self.comments,
+            "summary": self.aggregate.summary() if self.aggregate else None,
+            "error": self.error,
+            "cached": self.cached,
+            "degraded": self.degraded,
+            "results_url": f"/jobs/{self.id}/results",
+            "report_url": f"/jobs/{self.id}/report.pdf" if self.report else None,
+            "artifacts": {
+                name: f"/jobs/{self.id}/artifacts/{os.path.basename(path)}"
+                for name, path in self.artifacts.items()
+            },
+        }
+
+
+class BatchJob(AnalysisJob):
+    """Analysis of several videos whose comments share one inference stream"""
+
+    def __init__(self, params: dict, video_urls: list):
+        super().__init__(params)
+        self.videos = [
+            {
+                "url": url,
+                "video_id": extract_video_id(url),
+                "status": "queued",
+                "error": None,
+                "comments": {"downloaded": 0, "cleaned": 0, "scored": 0},
+                "aggregate": SentimentAggregator(),
+            }
+            for url in video_urls
+        ]
+
+    def to_dict(self) -> dict:
+        data = super().to_dict()
+        data["videos"] = [
+            {
+                "url": video["url"],
+                "video_id": video["video_id"],
+                "status": video["status"],
+                "error": video["error"],
+                "comments": video["comments"],
+                "summary": video["aggregate"].summary(),
+                "top_tokens": {
+                    label: video["aggregate"].top_tokens(label, 20)
+                    for label in SentimentAggregator.LABELS
+                },
+            }
+            for video in self.videos
+        ]
+        return data
+
+
+class JobQueue:
+    """In-process queue that runs analysis jobs on a fixed number of background workers"""
+
+    def __init__(self, max_concurrent: int, retention_seconds: int):
+        self.max_concurrent = max_concurrent
+        self.retention_seconds = retention_seconds
+        self.jobs = {}
+        self._queue = None
+        self._workers = []
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.max_concurrent)
+        ]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, params: dict, job: AnalysisJob = None) -> AnalysisJob:
+        self._prune()
+        job = job or AnalysisJob(params)
+        self.jobs[job.id] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def add_cached(self, job: AnalysisJob) -> AnalysisJob:
+        """Register an already finished job whose results come from the result cache"""
+        self._prune()
+        job.stages = {name: "done" for name in ANALYSIS_STAGES}
+        job.cached = True
+        job.status = "done"
+        job.finished_at = time.time()
+        job.publish("done", {"results_url": f"/jobs/{job.id}/results"})
+        self.jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str):
+        return self.jobs.get(job_id)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if job.finished and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+            artifact_store.remove(job_id)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: AnalysisJob):
+        job.status = "running"
+        try:
+            runner = run_batch_analysis if isinstance(job, BatchJob) else run_analysis
+            job.result_html = await runner(job)
+            job.status = "done"
+            logger.info(f"Analysis job {job.id} completed successfully")
+            await pools.run_io(store_cached_result, job)
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error(f"Unexpected error in analysis job {job.id}: {detail}")
+            logger.error(traceback.format_exc())
+            job.error = detail
+            job.result_html = render_error_page(detail)
+            job.status = "failed"
+        finally:
+            job.current_stage = None
+            job.finished_at = time.time()
+            if job.finished:
+                job.publish(job.status, {"results_url": f"/jobs/{job.id}/results", "error": job.error})
+
+
+job_queue = JobQueue(MAX_CONCURRENT_JOBS, JOB_RETENTION_SECONDS)
+
+
+def load_cached_result(params: dict, entry_dir: str, meta: dict) -> AnalysisJob:
+    """A new job holding a result cache entry's page, artifacts and report inputs.
+
+    Does the disk reads on an I/O thread; the job is registered afterwards, on the loop.
+    """
+    job = AnalysisJob(params)
+    for name, filename in meta["artifacts"].items():
+        job.artifacts[name] = artifact_store.link(job.id, os.path.join(entry_dir, filename))
+    with open(os.path.join(entry_dir, "results.html"), "r", encoding="utf-8") as f:
+        job.result_html = f.read()
+    frequencies_path = os.path.join(entry_dir, "frequencies.json")
+    if os.path.exists(frequencies_path):
+        with open(frequencies_path, "r", encoding="utf-8") as f:
+            job.frequencies = json.load(f)
+    report_path = os.path.join(entry_dir, "report.json")
+    if os.path.exists(report_path):
+        with open(report_path, "r", encoding="utf-8") as f:
+            job.report = json.load(f)
+    return job
+
+
+def store_cached_result(job: AnalysisJob):
+    """Save a finished job's results page and artifacts in the result cache"""
+    if job.params.get("incremental") or isinstance(job, BatchJob):
+        # A refresh reflects whatever was new at the time, so it can't be replayed by key
+        return
+    if job.degraded:
+        # Placeholder insights or fallback labels would be replayed long after the error cleared
+        logger.info(f"Not caching job {job.id}: some results are fallbacks")
+        return
+    try:
+        files = {"results.html": job.result_html.encode("utf-8")}
+        if job.frequencies is not None:
+            files["frequencies.json"] = json.dumps(job.frequencies).encode("utf-8")
+        if job.report is not None:
+            files["report.json"] = json.dumps(job.report).encode("utf-8")
+        artifacts = {}
+        for name, path in job.artifacts.items():
+            filename = os.path.basename(path)
+            files[filename] = path
+            artifacts[name] = filename
+        result_cache.put(
+            result_cache_key(job.params),
+            {"artifacts": artifacts, "video_id": extract_video_id(job.params["youtube_url"])},
+            files,
+        )
+    except Exception as e:
+        logger.error(f"Error caching results for job {job.id}: {e}")
+
+
+def get_job_or_404(job_id: str) -> AnalysisJob:
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    return etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+
+
+def compressed_response(request: Request, media_type: str, body: bytes, gzipped: bytes, headers: dict) -> Response:
+    """Send pre-compressed bytes to clients that accept gzip, the plain ones to the rest"""
+    headers = dict(headers, Vary="Accept-Encoding")
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(content=gzipped, media_type=media_type, headers=dict(headers, **{"Content-Encoding": "gzip"}))
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+class SitePages:
+    """Jinja2 templates compiled once, plus versioned CSS/JS and the pre-rendered landing page"""
+
+    ASSET_TYPES = {".css": "text/css; charset=utf-8", ".js": "text/javascript; charset=utf-8"}
+
+    def __init__(self, template_dir: str, static_dir: str):
+        self.template_dir = template_dir
+        self.static_dir = static_dir
+        self.asset_urls = {}  # "css/results.css" -> "/assets/results.<sha256>.css"
+        self.assets = {}  # "results.<sha256>.css" -> (media type, bytes, gzipped bytes)
+        self._latest = {}  # "results.css" -> "results.<sha256>.css"
+        self.landing = None  # (bytes, gzipped bytes, etag)
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Hash and gzip the CSS/JS, compile every template and render the landing page"""
+        with self._lock:
+            if self._templates:
+                return
+            for kind in ("css", "js"):
+                directory = os.path.join(self.static_dir, kind)
+                for filename in sorted(os.listdir(directory)):
+                    media_type = self.ASSET_TYPES.get(os.path.splitext(filename)[1])
+                    if media_type is None:
+                        continue
+                    with open(os.path.join(directory, filename), "rb") as f:
+                        body = f.read()
+                    # Content-addressed, so a changed file gets a new URL and old copies can be cached forever
+                    versioned = ArtifactStore.stored_name(filename, body)
+                    self.asset_urls[f"{kind}/{filename}"] = f"{ASSET_PREFIX}/{versioned}"
+                    self.assets[versioned] = (media_type, body, gzip.compress(body, 9, mtime=0))
+                    self._latest[filename] = versioned
+
+            env = Environment(
+                loader=FileSystemLoader(self.template_dir),
+                autoescape=select_autoescape(),
+                # Compiled once; templates ship with the code, so never re-check the files
+                auto_reload=False,
+                trim_blocks=True,
+                lstrip_blocks=True,
+            )
+            env.globals["asset_url"] = self.asset_urls.__getitem__
+            templates = {name: env.get_template(name) for name in env.list_templates()}
+
+            # The landing page has no per-request content: render and compress it once
+            body = templates["index.html"].render().encode("utf-8")
+            self.landing = (body, gzip.compress(body, 9, mtime=0), f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+            self._templates = templates
+
+    def render(self, name: str, **context) -> str:
+        if not self._templates:
+            self.load()
+        return self._templates[name].render(**context)
+
+    def asset(self, filename: str):
+        """(media type, bytes, gzipped, still current) for a versioned asset name.
+
+        Pages from the result cache may name a version from before a deploy; those get
+        the current file of the same name instead of a 404, just not cached for long.
+        """
+        if filename in self.assets:
+            return (*self.assets[filename], True)
+        stem, ext = os.path.splitext(filename)
+        latest = self._latest.get(stem.rsplit(".", 1)[0] + ext)
+        return (*self.assets[latest], False) if latest else None
+
+
+site = SitePages(TEMPLATE_DIR, STATIC_DIR)
+
+
+def preload_modules(module_names: list) -> dict:
+    """Import modules ahead of use (run in each CPU worker too); returns this process's report"""
+    for name in module_names:
+        try:
+            lazy_import(name)
+        except Exception as e:
+            logger.error(f"Error importing {name}: {e}")
+    return startup_report.to_dict()["components"]
+
+
+async def _warm_up():
+    """Pay for heavy imports and the model load after the server is already answering"""
+    started = time.perf_counter()
+    await asyncio.to_thread(preload_modules, WARMUP_IMPORTS)
+    # Spawned CPU workers import main cheaply now; give each its heavy modules up front
+    worker_reports = await asyncio.gather(
+        *(pools.run_cpu(preload_modules, CPU_WORKER_IMPORTS) for _ in range(pools.cpu_workers)),
+        return_exceptions=True,
+    )
+    for report in worker_reports:
+        if isinstance(report, dict):
+            for name, seconds in report.items():
+                startup_report.components.setdefault(f"cpu worker {name}", seconds)
+    try:
+        await asyncio.to_thread(sentiment_models.load)
+    except Exception:
+        # Already logged; /analyze retries the load and /ready reports the failure
+        pass
+    startup_report.warmup_seconds = round(time.perf_counter() - started, 3)
+    logger.info(f"Startup report: {json.dumps(startup_report.to_dict())}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with startup_report.measure("templates and static assets"):
+        site.load()
+    pools.start()
+    job_queue.start()
+    startup_report.server_ready_seconds = startup_report.since_start()
+    logger.info(f"Server ready {startup_report.server_ready_seconds}s after start")
+    # Import and load in the background so the server binds right away; /ready flips once the model is resident
+    warmup_task = asyncio.create_task(_warm_up())
+    yield
+    warmup_task.cancel()
+    await job_queue.stop()
+    pools.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Create static directory if it doesn't exist
+os.makedirs(STATIC_DIR, exist_ok=True)
+
+app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+
+
+@app.get(ASSET_PREFIX + "/{filename}")
+async def static_asset(filename: str, request: Request):
+    """Versioned CSS and JS, gzipped once at startup and cacheable for a year"""
+    asset = site.asset(filename)
+    if asset is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    media_type, body, gzipped, current = asset
+    cache_control = "public, max-age=31536000, immutable" if current else "no-cache"
+    return compressed_response(request, media_type, body, gzipped, {"Cache-Control": cache_control})
+
+
+@app.get("/ready")
+async def readiness():
+    """Readiness probe: 200 only once the sentiment model is loaded and warmed"""
+    body = {
+        "ready": sentiment_models.ready,
+        "model": sentiment_models.model_name,
+        "backend": sentiment_models.active_backend or sentiment_models.backend,
+    }
+    if sentiment_models.ready:
+        return body
+    if sentiment_models.error:
+        body["error"] = sentiment_models.error
+    return JSONResponse(content=body, status_code=503)
+
+
+@app.get("/startup")
+async def startup_timings():
+    """Cold-start breakdown: module import, server bind, and each heavy import or model step"""
+    return startup_report.to_dict()
+
+
+@app.get("/", response_class=HTMLResponse)
+async def read_root(request: Request):
+    """Landing page, rendered and gzipped once at startup"""
+    if site.landing is None:
+        site.load()
+    body, gzipped, etag = site.landing
+    # Revalidate rather than cache outright: a deploy changes the asset URLs inside it
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return compressed_response(request, "text/html; charset=utf-8", body, gzipped, headers)
+
+def safe_encode(text):
+    """Safely encode text for PDF generation"""
+    try:
+        # Replace problematic characters
+        text = str(text)
+        # Remove or replace non-Latin characters
+        text = text.encode('ascii', errors='ignore').decode('ascii')
+        return text
+    except Exception as e:
+        logger.error(f"Error encoding text: {e}")
+        return "Error encoding text"
+
+# Links and emoticons go first so their letters don't survive as words; every other
+# non-letter (emoji, digits, punctuation) falls to the last alternative. One fused pass
+# replaces the separate hyperlink/emoticon/emoji/number/special-character passes.
+CLEANING_PATTERN = (
+    r"https?://\S+|www\.\S+"
+    r"|[:;=X8B][-oO^']?[\)\(DPp\[\]{}@/\|\\<>*~]"
+    r"|[^a-zA-Z\s]"
+)
+MAX_CLEANED_CHARS = 512
+
+
+def build_cleaning_plan(frame, target_variable: str, all_stopwords: list) -> "pl.LazyFrame":
+    """Lazy query that adds a cleaned_text column: regex cleanup, then stopword removal.
+
+    Links, emoticons and every other non-letter go in one fused regex pass, and stopwords
+    are filtered inside each row's token list, so no Python runs per comment. Rows whose
+    cleaned text exceeds MAX_CLEANED_CHARS are filtered out, as before.
+    """
+    lazy = frame.lazy() if isinstance(frame, pl.DataFrame) else frame
+    stopwords = sorted({word.lower() for word in all_stopwords})
+    token = pl.element()
+    return (
+        lazy.with_columns(
+            pl.col(target_variable)
+            .cast(pl.Utf8)
+            .fill_null("")
+            .str.replace_all(CLEANING_PATTERN, "")
+            # Tabs and newlines become token separators; the empty tokens from runs
+            # of spaces are dropped with the stopwords
+            .str.replace_all(r"[^\S ]+", " ")
+            .str.split(" ")
+            .list.eval(token.filter((token != "") & ~token.str.to_lowercase().is_in(stopwords)))
+            .list.join(" ")
+            .alias("cleaned_text")
+        )
+        .filter(pl.col("cleaned_text").str.len_chars() <= MAX_CLEANED_CHARS)
+    )
+
+
+def clean_text_data(df: "pl.DataFrame", target_variable: str, all_stopwords: list) -> "pl.DataFrame":
+    """Clean text data with a single lazy Polars query"""
+    try:
+        cleaned = build_cleaning_plan(df, target_variable, all_stopwords).collect()
+        logger.info(f"Text cleaning complete. Final dataframe shape: {cleaned.shape}")
+        return cleaned
+    except Exception as e:
+        logger.error(f"Error in text cleaning, scoring {len(df)} comments uncleaned: {e}")
+        # Keep the comments rather than losing the batch; whitespace is still collapsed
+        return df.with_columns(
+            pl.col(target_variable).cast(pl.Utf8).fill_null("").str.replace_all(r"\s+", " ")
+            .str.strip_chars().alias("cleaned_text")
+        )
+
+def analyze_sentiment_batch(texts, sentiment_analysis, label_index, batch_size=SENTIMENT_BATCH_SIZE):
+    """Score comments in length-sorted batches.
+
+    Returns label and score arrays aligned with texts, plus a mask of the comments the
+    model actually scored (blank or failing comments fall back to neutral/0.5).
+    """
+    texts = ["" if text is None else str(text) for text in texts]
+    labels = np.full(len(texts), "neutral", dtype=object)
+    scores = np.full(len(texts), 0.5, dtype=np.float64)
+    scored = np.zeros(len(texts), dtype=bool)
+
+    # Blank comments stay neutral without touching the model
+    pending = [i for i, text in enumerate(texts) if text.strip()]
+    if not pending:
+        return labels, scores, scored
+
+    # Sort by token length so every batch pads to roughly the same size
+    tokenizer = getattr(sentiment_analysis, "tokenizer", None)
+    if tokenizer is not None:
+        encoded = tokenizer([texts[i] for i in pending], truncation=True)["input_ids"]
+        lengths = np.fromiter((len(ids) for ids in encoded), dtype=np.int64, count=len(pending))
+    else:
+        lengths = np.fromiter((len(texts[i]) for i in pending), dtype=np.int64, count=len(pending))
+    order = np.asarray(pending)[np.argsort(lengths, kind="stable")]
+
+    batch_size = max(1, int(batch_size))
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        batch_texts = [texts[i] for i in batch]
+        try:
+            results = sentiment_analysis(batch_texts, batch_size=len(batch_texts), truncation=True)
+            labels[batch] = [label_index.get(result["label"], "neutral") for result in results]
+            scores[batch] = [result["score"] for result in results]
+            scored[batch] = True
+        except Exception as e:
+            # Isolate the bad comment instead of sending the whole batch to neutral
+            logger.error(f"Batch inference failed, scoring {len(batch)} comments individually: {e}")
+            for i, text in zip(batch, batch_texts):
+                try:
+                    result = sentiment_analysis(text, truncation=True)[0]
+                    labels[i] = label_index.get(result["label"], "neutral")
+                    scores[i] = result["score"]
+                    scored[i] = True
+                except Exception as item_error:
+                    logger.error(f"Error in sentiment analysis: {item_error}")
+
+    return labels, scores, scored
+
+def analyze_sentiment_cached(texts, sentiment_analysis, label_index, model_id, cache=None):
+    """Serve repeated comments from the comment cache and send only the misses to the model"""
+    cache = cache or comment_cache
+    texts = ["" if text is None else str(text) for text in texts]
+    labels = np.full(len(texts), "neutral", dtype=object)
+    scores = np.full(len(texts), 0.5, dtype=np.float64)
+
+    keys = [cache.make_key(text, model_id) if text.strip() else None for text in texts]
+    try:
+        cached = cache.get_many({key for key in keys if key is not None})
+    except Exception as e:
+        logger.error(f"Comment cache lookup failed, scoring everything: {e}")
+        cached = {}
+
+    # Identical uncached comments are only scored once
+    miss_positions = {}
+    for i, key in enumerate(keys):
+        if key is None:
+            continue
+        if key in cached:
+            labels[i], scores[i] = cached[key]
+        else:
+            miss_positions.setdefault(key, []).append(i)
+
+    if miss_positions:
+        miss_keys = list(miss_positions)
+        miss_labels, miss_scores, miss_scored = analyze_sentiment_batch(
+            [texts[miss_positions[key][0]] for key in miss_keys], sentiment_analysis, label_index
+        )
+        for key, label, score in zip(miss_keys, miss_labels, miss_scores):
+            labels[miss_positions[key]] = label
+            scores[miss_positions[key]] = score
+        try:
+            cache.put_many(
+                (key, label, score)
+                for key, label, score, ok in zip(miss_keys, miss_labels, miss_scores, miss_scored)
+                if ok
+            )
+        except Exception as e:
+            logger.error(f"Comment cache write failed: {e}")
+
+    logger.info(
+        f"Comment cache: {sum(key in cached for key in keys if key)} hits, "
+        f"{len(miss_positions)} unique comments sent to the model"
+    )
+    return labels, scores
+
+class CommentDeduplicator:
+    """Groups exact and near-duplicate comments of one analysis so each group is scored once.
+
+    Exact duplicates share a group through a hash of the normalized text. Longer comments
+    also get a MinHash signature over character shingles; LSH banding finds candidate
+    groups and the signature agreement confirms them. Groups persist across micro-batches,
+    so a bot wave spread over the whole comment section is still scored once. Only the
+    `max_groups` most recently seen groups are kept, so memory stays bounded however
+    many comments stream through.
+    """
+
+    _PRIME = (1 << 61) - 1
+
+    def __init__(self, threshold=NEAR_DUP_THRESHOLD, num_perm=NEAR_DUP_PERMUTATIONS, bands=NEAR_DUP_BANDS,
+                 min_chars=NEAR_DUP_MIN_CHARS, shingle_size=4, seed=1, max_groups=NEAR_DUP_MAX_GROUPS):
+        self.threshold = threshold
+        self.bands = max(1, min(bands, num_perm))
+        self.rows = num_perm // self.bands
+        self.min_chars = min_chars
+        self.shingle_size = shingle_size
+        self.max_groups = max(1, max_groups)
+        rng = np.random.default_rng(seed)
+        # a, b < 2**32 and shingle hashes < 2**32 keep a * h + b inside uint64
+        self._a = rng.integers(1, 1 << 32, size=self.rows * self.bands, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=self.rows * self.bands, dtype=np.uint64)
+        # Both LRU ordered; exact keys of forgotten groups are skipped until they age out
+        self._exact = OrderedDict()
+        self._groups = OrderedDict()  # group -> [label, score, signature row or None, band keys]
+        self._buckets = {}
+        # Signature rows are reused once their group is forgotten; grown by doubling up to the cap
+        self._signatures = np.zeros((64, self.rows * self.bands), dtype=np.uint64)
+        self._free_rows = []
+        self._rows_used = 0
+        # Representative text of each group until it has been scored
+        self.texts = {}
+        self.unique = 0
+        self.near_duplicates = 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(str(text).split())
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature of the character shingles of a normalized comment"""
+        size = self.shingle_size
+        shingles = {text[i:i + size] for i in range(max(1, len(text) - size + 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        return ((np.outer(hashes, self._a) + self._b) % self._PRIME).min(axis=0)
+
+    def _near_group(self, signature: np.ndarray):
+        band_keys = [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)
+        ]
+        candidates = list({group for key in band_keys for group in self._buckets.get(key, ())})
+        if not candidates:
+            return None, band_keys
+        rows = [self._groups[group][2] for group in candidates]
+        similarity = (self._signatures[rows] == signature).mean(axis=1)
+        best = int(np.argmax(similarity))
+        if similarity[best] < self.threshold:
+            return None, band_keys
+        return candidates[best], band_keys
+
+    def _open(self, text, signature, band_keys) -> int:
+        group = self.unique
+        self.unique += 1
+        self.texts[group] = "" if text is None else str(text)
+        row = None
+        if signature is not None:
+            if self._free_rows:
+                row = self._free_rows.pop()
+            else:
+                row = self._rows_used
+                self._rows_used += 1
+                if row >= len(self._signatures):
+                    self._signatures = np.concatenate([self._signatures, np.zeros_like(self._signatures)])
+            self._signatures[row] = signature
+        for key in band_keys:
+            self._buckets.setdefault(key, []).append(group)
+        self._groups[group] = [None, None, row, band_keys]
+        return group
+
+    def assign(self, texts) -> np.ndarray:
+        """Group id for every comment, opening new groups for comments not seen before"""
+        groups = np.empty(len(texts), dtype=np.int64)
+        for i, text in enumerate(texts):
+            normalized = self.normalize("" if text is None else text)
+            exact_key = hashlib.sha1(normalized.encode("utf-8")).digest()
+            group = self._exact.get(exact_key)
+            if group not in self._groups:
+                signature, band_keys = None, ()
+                group = None
+                if self.threshold > 0 and len(normalized) >= self.min_chars:
+                    signature = self.signature(normalized.lower())
+                    group, band_keys = self._near_group(signature)
+                    if group is not None:
+                        self.near_duplicates += 1
+                if group is None:
+                    group = self._open(text, signature, band_keys)
+                self._exact[exact_key] = group
+            self._exact.move_to_end(exact_key)
+            self._groups.move_to_end(group)
+            groups[i] = group
+        return groups
+
+    def unscored(self, groups) -> list:
+        """Distinct groups in first-seen order that don't have a label yet"""
+        return [int(group) for group in dict.fromkeys(groups.tolist()) if self._groups[group][0] is None]
+
+    def record(self, groups, labels, scores):
+        for group, label, score in zip(groups, labels, scores):
+            entry = self._groups[group]
+            entry[0] = label
+            entry[1] = float(score)
+            # Only the label is needed from here on
+            self.texts.pop(group, None)
+
+    def fan_out(self, groups):
+        """Per-comment label and score arrays, copied from each comment's group"""
+        labels = np.array([self._groups[group][0] for group in groups], dtype=object)
+        scores = np.array([self._groups[group][1] for group in groups], dtype=np.float64)
+        return labels, scores
+
+    def trim(self):
+        """Forget the least recently seen groups and exact keys beyond `max_groups`"""
+        while len(self._groups) > self.max_groups:
+            group, (_, _, row, band_keys) = self._groups.popitem(last=False)
+            self.texts.pop(group, None)
+            if row is not None:
+                self._free_rows.append(row)
+            for key in band_keys:
+                bucket = self._buckets[key]
+                bucket.remove(group)
+                if not bucket:
+                    del self._buckets[key]
+        while len(self._exact) > self.max_groups:
+            self._exact.popitem(last=False)
+
+
+def analyze_sentiment_deduped(texts, dedup, sentiment_analysis, label_index, model_id):
+    """Score one representative per duplicate group and fan its label out to every member.
+
+    Returns labels and scores aligned with texts, plus how many new representatives
+    were sent on to the comment cache and the model.
+    """
+    groups = dedup.assign(texts)
+    pending = dedup.unscored(groups)
+    if pending:
+        labels, scores = analyze_sentiment_cached(
+            [dedup.texts[group] for group in pending], sentiment_analysis, label_index, model_id
+        )
+        dedup.record(pending, labels, scores)
+    labels, scores = dedup.fan_out(groups)
+    dedup.trim()
+    return labels, scores, len(pending)
+
+def token_frequencies(texts, labels):
+    """Per-sentiment token counts of one micro-batch from a single group-by.
+
+    Yields (label, tokens, counts) with tokens lowercased and split on whitespace.
+    """
+    if len(texts) == 0:
+        return
+    frame = pl.DataFrame(
+        {"label": np.asarray(labels, dtype=object).astype(str), "text": np.asarray(texts, dtype=object).astype(str)}
+    )
+    grouped = (
+        frame.lazy()
+        .select("label", pl.col("text").str.to_lowercase().str.split(" ").alias("token"))
+        .explode("token")
+        .filter(pl.col("token") != "")
+        .group_by("label", "token")
+        .agg(pl.len().alias("count"))
+        .group_by("label")
+        .agg("token", "count")
+        .collect()
+    )
+    yield from grouped.iter_rows()
+
+class SentimentAggregator:
+    """Running label counts, score histograms and per-sentiment token counts for a comment stream.
+
+    Memory grows with the vocabulary, not with the number of comments, so a video
+    can be analyzed without keeping its comments around.
+    """
+
+    LABELS = ("positive", "neutral", "negative")
+    HISTOGRAM_BINS = 20
+
+    def __init__(self):
+        self.total = 0
+        self.label_counts = Counter()
+        self.score_histograms = {
+            label: np.zeros(self.HISTOGRAM_BINS, dtype=np.int64) for label in self.LABELS
+        }
+        self.token_counts = {label: Counter() for label in self.LABELS}
+
+    def update(self, texts, labels, scores):
+        """Fold one scored micro-batch into the running totals"""
+        labels = np.asarray(labels, dtype=object)
+        scores = np.asarray(scores, dtype=np.float64)
+        self.total += len(labels)
+        for label in self.LABELS:
+            mask = labels == label
+            if not mask.any():
+                continue
+            self.label_counts[label] += int(mask.sum())
+            self.score_histograms[label] += np.histogram(
+                scores[mask], bins=self.HISTOGRAM_BINS, range=(0.0, 1.0)
+            )[0]
+        for label, tokens, counts in token_frequencies(texts, labels):
+            if label in self.token_counts:
+                self.token_counts[label].update(dict(zip(tokens, counts)))
+
+    def merge(self, other: "SentimentAggregator"):
+        self.total += other.total
+        self.label_counts.update(other.label_counts)
+        for label in self.LABELS:
+            self.score_histograms[label] += other.score_histograms[label]
+            self.token_counts[label].update(other.token_counts[label])
+
+    def counts(self) -> dict:
+        """Label counts, most common first (same order as pandas value_counts)"""
+        return dict(self.label_counts.most_common())
+
+    def top_tokens(self, label: str, n: int = 1000) -> dict:
+        return dict(self.token_counts[label].most_common(n))
+
+    def frequency_tables(self, n: int = FREQUENCY_TABLE_SIZE) -> dict:
+        """Most frequent non-stopword tokens per sentiment, shared by every output of a job"""
+        tables = {}
+        for label in self.LABELS:
+            counts = self.token_counts[label]
+            # Over-fetch so dropping WordCloud's stopwords still leaves n tokens
+            stopwords = wordcloud.STOPWORDS
+            top = counts.most_common(n + len(stopwords))
+            tables[label] = dict(islice(((word, count) for word, count in top if word not in stopwords), n))
+        return tables
+
+    def to_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "label_counts": dict(self.label_counts),
+            "score_histograms": {
+                label: histogram.tolist() for label, histogram in self.score_histograms.items()
+            },
+            "token_counts": {label: dict(counts) for label, counts in self.token_counts.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SentimentAggregator":
+        aggregate = cls()
+        aggregate.total = data["total"]
+        aggregate.label_counts.update(data["label_counts"])
+        for label in cls.LABELS:
+            aggregate.score_histograms[label] += np.asarray(data["score_histograms"][label], dtype=np.int64)
+            aggregate.token_counts[label].update(data["token_counts"][label])
+        return aggregate
+
+    def summary(self) -> dict:
+        return {
+            "total": self.total,
+            "label_counts": self.counts(),
+            "score_histograms": {
+                label: histogram.tolist() for label, histogram in self.score_histograms.items()
+            },
+            "vocabulary_size": {label: len(counts) for label, counts in self.token_counts.items()},
+        }
+
+def _wordcloud_canvas(colormap, scale=1.0) -> "wordcloud.WordCloud":
+    width, height = WORDCLOUD_LAYOUT_SIZE
+    return wordcloud.WordCloud(
+        min_font_size=4,
+        max_words=FREQUENCY_TABLE_SIZE,
+        width=width,
+        height=height,
+        scale=scale,
+        colormap=colormap,
+        background_color="white",
+        margin=10,
+        relative_scaling=0.5,
+        font_path=None,
+        # Same frequencies, same picture: keeps artifact and insights cache hashes stable
+        random_state=0,
+    )
+
+def _png_bytes(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def create_modern_wordcloud(frequencies, colormap):
+    """Lay out a word cloud from a frequency table; returns (preview PNG bytes, layout)"""
+    try:
+        if not frequencies:
+            return None, None
+
+        wordcloud = _wordcloud_canvas(colormap, WORDCLOUD_PREVIEW_SCALE).generate_from_frequencies(frequencies)
+        return _png_bytes(wordcloud.to_image()), wordcloud.layout_
+    except Exception as e:
+        logger.error(f"Error creating wordcloud ({colormap}): {e}")
+        return None, None
+
+def render_wordcloud_layout(layout, colormap, scale) -> Image.Image:
+    """Redraw an already computed word cloud layout at another resolution"""
+    wordcloud = _wordcloud_canvas(colormap, scale)
+    wordcloud.layout_ = layout
+    return wordcloud.to_image()
+
+def comment_frame(batch) -> "pl.DataFrame":
+    """Polars frame for one downloaded micro-batch of (comment_id, text) pairs"""
+    return pl.DataFrame(
+        batch, schema={"comment_id": pl.Utf8, "comment": pl.Utf8}, orient="row"
+    )
+
+_STREAM_END = object()
+
+def _put_from_thread(queue, item, loop, stop):
+    """Blocking put onto an asyncio.Queue from a worker thread; gives up once `stop` is set"""
+    if stop.is_set():
+        return False
+    future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+    while True:
+        try:
+            future.result(timeout=0.5)
+            return True
+        except concurrent.futures.TimeoutError:
+            # Queue still full: keep waiting on the same put, so a batch is never queued twice.
+            # Only once the consumers are gone is it abandoned
+            if stop.is_set():
+                future.cancel()
+                return False
+
+def expand_playlist(playlist_url: str) -> list:
+    """Watch URLs of the videos listed on a playlist page.
+
+    Only the initially rendered page is read (YouTube serves the first ~100 entries
+    there); longer playlists should be passed as explicit URL lists.
+    """
+    downloader = youtube_comment_downloader.YoutubeCommentDownloader()
+    response = downloader.session.get(playlist_url, timeout=30)
+    response.raise_for_status()
+    video_ids = list(dict.fromkeys(re.findall(r'"videoId":"([A-Za-z0-9_-]{11})"', response.text)))
+    return [f"https://www.youtube.com/watch?v={video_id}" for video_id in video_ids]
+
+def download_comment_batches(queue, loop, stop, youtube_url, limit, batch_size=STREAM_BATCH_SIZE,
+                             seen=None):
+    """Producer thread: stream up to `limit` (comment_id, text) pairs onto `queue` in micro-batches.
+
+    With `seen` (a comment_id -> bool callable) comments are fetched newest first and the
+    download stops once it runs into comments that an earlier run already scored.
+    """
+    downloader = youtube_comment_downloader.YoutubeCommentDownloader()
+    comments = downloader.get_comments_from_url(
+        youtube_url,
+        sort_by=youtube_comment_downloader.SORT_BY_RECENT if seen else youtube_comment_downloader.SORT_BY_POPULAR
+    )
+    total = 0
+    seen_streak = 0
+    batch = []
+    for comment in comments:
+        if seen is not None:
+            if seen(comment['cid']):
+                seen_streak += 1
+                if seen_streak >= INCREMENTAL_STOP_AFTER_SEEN:
+                    break
+                continue
+            seen_streak = 0
+        batch.append((comment['cid'], comment['text']))
+        if len(batch) >= batch_size:
+            if not _put_from_thread(queue, batch, loop, stop):
+                return total
+            total += len(batch)
+            batch = []
+        if limit is not None and total + len(batch) >= limit:
+            break
+    if batch and _put_from_thread(queue, batch, loop, stop):
+        total += len(batch)
+    return total
+
+def create_sentiment_plot(sentiment_counts, fmt="svg", dpi=100):
+    """Render the sentiment distribution bar chart as SVG (or PNG at dpi) bytes.
+
+    Uses a standalone Figure instead of pyplot, so there is no global figure state to
+    share between concurrent renders. matplotlib is only imported by the workers that
+    actually draw a chart.
+    """
+    try:
+        from matplotlib import rc_context
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=CHART_FIGSIZE, facecolor="white")
+        ax = fig.add_subplot()
+
+        labels = list(sentiment_counts.keys())
+        colors = [SENTIMENT_COLORS.get(label, "#6B7280") for label in labels]
+        bars = ax.bar(labels, list(sentiment_counts.values()),
+                      color=colors, alpha=0.8, edgecolor='white', linewidth=2)
+
+        # Add value labels on bars
+        for bar in bars:
+            height = bar.get_height()
+            ax.text(bar.get_x() + bar.get_width()/2., height + 1,
+                    f'{int(height)}', ha='center', va='bottom', fontweight='bold', fontsize=14)
+
+        ax.set_title('Sentiment Distribution Analysis', fontsize=20, fontweight='bold', pad=20)
+        ax.set_xlabel('Sentiment Category', fontsize=14, fontweight='600')
+        ax.set_ylabel('Number of Comments', fontsize=14, fontweight='600')
+        ax.grid(True, alpha=0.3, linestyle='--')
+        ax.set_facecolor('#f8f9fa')
+
+        # Style the plot
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax.spines['left'].set_color('#dee2e6')
+        ax.spines['bottom'].set_color('#dee2e6')
+
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        # Keep SVG text as text rather than one path per glyph; omit the date so output is stable
+        with rc_context({"svg.fonttype": "none", "svg.hashsalt": "sentiment"}):
+            fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight', facecolor='white',
+                        metadata={"Date": None} if fmt == "svg" else None)
+        logger.info(f"Sentiment distribution plot created ({fmt})")
+        return buffer.getvalue()
+    except Exception as e:
+        logger.error(f"Error creating sentiment plot: {e}")
+        return None
+
+def format_top_words(frequency_table: dict, n: int = 15) -> str:
+    """'word (count), ...' for the n most frequent tokens of a frequency table"""
+    return ", ".join(f"{word} ({count})" for word, count in islice((frequency_table or {}).items(), n))
+
+class GeminiClient:
+    """One configured Gemini model shared by every job, called through the async API.
+
+    Each attempt has its own timeout; transient failures (timeouts, rate limits, 5xx) are
+    retried with jittered exponential backoff while the caller's retry budget lasts.
+    """
+
+    def __init__(self, api_key, model_name, timeout=GEMINI_TIMEOUT_SECONDS, max_attempts=GEMINI_MAX_ATTEMPTS,
+                 backoff=GEMINI_BACKOFF_SECONDS, endpoint=GEMINI_API_ENDPOINT):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.endpoint = endpoint
+        self._model = None
+        self._loop = None
+
+    def _get_model(self):
+        # gRPC asyncio channels belong to the loop that created them
+        loop = asyncio.get_running_loop()
+        if self._model is None or self._loop is not loop:
+            genai.configure(api_key=self.api_key)
+            model = genai.GenerativeModel(self.model_name)
+            if self.endpoint:
+                # The SDK only builds TLS channels; a local fake server needs a plaintext one
+                import grpc
+                from google.ai.generativelanguage_v1beta.services.generative_service import (
+                    GenerativeServiceAsyncClient, transports,
+                )
+                channel = grpc.aio.insecure_channel(self.endpoint)
+                model._async_client = GenerativeServiceAsyncClient(
+                    transport=transports.GenerativeServiceGrpcAsyncIOTransport(channel=channel)
+                )
+            self._model = model
+            self._loop = loop
+        return self._model
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        from google.api_core import exceptions as api_exceptions
+
+        return isinstance(error, (
+            asyncio.TimeoutError,
+            api_exceptions.DeadlineExceeded,
+            api_exceptions.ResourceExhausted,
+            api_exceptions.ServiceUnavailable,
+            api_exceptions.InternalServerError,
+        ))
+
+    async def generate(self, contents, budget: dict) -> str:
+        """Text of one generate_content call, retried while `budget["retries"]` lasts"""
+        model = self._get_model()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                # retry=None turns off the SDK's own retries so only this loop (and budget) retries
+                response = await asyncio.wait_for(
+                    model.generate_content_async(contents, request_options={"retry": None}), self.timeout
+                )
+                return response.text
+            except Exception as e:
+                if attempt >= self.max_attempts or budget["retries"] <= 0 or not self.is_retryable(e):
+                    raise
+                budget["retries"] -= 1
+                delay = random.uniform(0, self.backoff * 2 ** (attempt - 1))
+                logger.warning(f"Gemini call failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+
+gemini_client = GeminiClient(API_KEY, GEMINI_MODEL)
+
+
+def insights_cache_key(model_name: str, prompt: str, input_hash: str) -> str:
+    """Hash of the model, the full prompt and a content hash of the image or table it describes"""
+    key_fields = {"model": model_name, "prompt": prompt, "input": input_hash}
+    return hashlib.sha256(json.dumps(key_fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+async def generate_cached(client, prompt, contents, input_hash, budget, cache=None) -> str:
+    """Gemini answer from the insights cache, or from a live call that is then cached"""
+    cache = cache or insights_cache
+    key = insights_cache_key(client.model_name, prompt, input_hash)
+    try:
+        hit = await pools.run_io(cache.get, key)
+    except Exception as e:
+        logger.error(f"Insights cache lookup failed: {e}")
+        hit = None
+    if hit is not None:
+        logger.info("Gemini answer served from the insights cache")
+        return hit[1]["text"]
+
+    text = await client.generate(contents, budget)
+    try:
+        await pools.run_io(cache.put, key, {"text": text, "model": client.model_name}, {})
+    except Exception as e:
+        logger.error(f"Insights cache write failed: {e}")
+    return text
+
+
+async def generate_gemini_insights(custom_question, wordcloud_images, frequencies=None, client=None,
+                                   on_answer=None, cache=None, on_fallback=None):
+    """Ask Gemini for per-sentiment insights and an executive summary, all calls in parallel.
+
+    Answers are cached by model, prompt and input hash, so re-analysing a video whose
+    word clouds haven't changed makes no Gemini calls at all. `on_answer(label, text)`
+    is called as each answer arrives, with label "summary" for the summary, and
+    `on_fallback(label)` when an answer is placeholder text because its call failed.
+    `cache` defaults to the app's insights cache.
+    """
+    client = client or gemini_client
+    frequencies = frequencies or {}
+    budget = {"retries": GEMINI_RETRY_BUDGET}
+
+    async def label_insights(label, wordcloud_png):
+        try:
+            # Send the PNG as-is rather than letting the SDK re-encode a PIL image
+            img = {"mime_type": "image/png", "data": wordcloud_png}
+            prompt = f"{custom_question} As a marketing consultant, I aim to analyze consumer insights derived from the {label} sentiment wordcloud. Please provide actionable insights and recommendations based on this {label} sentiment analysis in a structured format with bullet points."
+            if frequencies.get(label):
+                prompt += f" The most frequent words, with counts, are: {format_top_words(frequencies[label])}."
+            image_hash = hashlib.sha256(wordcloud_png).hexdigest()
+            text = await generate_cached(client, prompt, [prompt, img], image_hash, budget, cache)
+            logger.info(f"Generated Gemini response for {label}")
+            return text
+        except Exception as e:
+            logger.error(f"Error generating content with Gemini for {label}: {e}")
+            if on_fallback:
+                on_fallback(label)
+            return f"Analysis for {label} sentiment: Unable to generate detailed insights due to processing limitations."
+
+    async def summary():
+        # The summary prompt doesn't depend on the per-sentiment answers, so it runs alongside them
+        try:
+            summary_prompt = f"{custom_question} Based on the overall sentiment analysis of YouTube comments, please provide a comprehensive business strategy summary with key insights and actionable recommendations."
+            # Scoped to the analysed comments so other videos asking the same question don't share it
+            table_hash = hashlib.sha256(json.dumps(frequencies, sort_keys=True).encode("utf-8")).hexdigest()
+            return await generate_cached(client, summary_prompt, summary_prompt, table_hash, budget, cache)
+        except Exception as e:
+            logger.error(f"Error generating summary: {e}")
+            if on_fallback:
+                on_fallback("summary")
+            return "Executive summary: Analysis completed with limited processing capabilities."
+
+    async def answered(label, answer):
+        text = await answer
+        if on_answer:
+            on_answer(label, text)
+        return text
+
+    labels = [label for label, wordcloud_png in wordcloud_images.items() if wordcloud_png]
+    if not labels:
+        return {}, None
+    *texts, response_result = await asyncio.gather(
+        *(answered(label, label_insights(label, wordcloud_images[label])) for label in labels),
+        answered("summary", summary()),
+    )
+    return dict(zip(labels, texts)), response_result
+
+def _print_pixels(mm: float) -> int:
+    return round(mm / 25.4 * REPORT_IMAGE_DPI)
+
+def encode_report_image(image: Image.Image, width_mm: float):
+    """Downsample an image to its printed width and encode it for FPDF.image.
+
+    Charts and word clouds are flat colour on white, so a 256-colour palette under
+    Flate is both smaller than JPEG and free of ringing around text. JPEG bytes are
+    embedded as they are (DCTDecode), without a second encode.
+    """
+    image = image.convert("RGB")
+    width = _print_pixels(width_mm)
+    if image.width > width:
+        image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    if REPORT_IMAGE_FORMAT == "jpeg":
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=REPORT_JPEG_QUALITY, optimize=True)
+        buffer.seek(0)
+        return buffer
+    return image.quantize(256, method=Image.Quantize.FASTOCTREE)
+
+def create_pdf_report(sentiment_counts, wordcloud_layouts, gemini_responses, response_result, frequencies=None):
+    """Build the PDF report from the rendered charts and Gemini insights, returned as bytes.
+
+    The chart and the word clouds (as (layout, colormap) pairs) are drawn straight at
+    their printed size and REPORT_IMAGE_DPI, so nothing larger than the page needs is
+    rendered or embedded. FPDF keys images by content, so a repeated image is stored
+    as one XObject.
+    """
+    try:
+        pdf = fpdf.FPDF()
+        pdf.add_page()
+        pdf.set_font("Helvetica", size=16)
+        pdf.cell(200, 15, text="YouTube Sentiment Analysis Report", new_x="LMARGIN", new_y="NEXT", align="C")
+        pdf.ln(5)
+
+        # Add sentiment distribution
+        chart_dpi = math.ceil(_print_pixels(REPORT_IMAGE_WIDTH_MM) / CHART_FIGSIZE[0])
+        sentiment_plot = create_sentiment_plot(sentiment_counts, fmt="png", dpi=chart_dpi) if sentiment_counts else None
+        if sentiment_plot:
+            chart = encode_report_image(Image.open(io.BytesIO(sentiment_plot)), REPORT_IMAGE_WIDTH_MM)
+            pdf.image(chart, x=10, y=40, w=REPORT_IMAGE_WIDTH_MM)
+            pdf.ln(120)
+
+        # Add wordclouds and analysis
+        wordcloud_scale = _print_pixels(REPORT_IMAGE_WIDTH_MM) / WORDCLOUD_LAYOUT_SIZE[0]
+        for label, (layout, colormap) in wordcloud_layouts.items():
+            if layout and label in gemini_responses:
+                wordcloud_image = encode_report_image(
+                    render_wordcloud_layout(layout, colormap, wordcloud_scale), REPORT_IMAGE_WIDTH_MM
+                )
+                pdf.add_page()
+                pdf.set_font("Helvetica", size=14)
+                pdf.cell(200, 10, text=f"{label.title()} Sentiment Analysis", new_x="LMARGIN", new_y="NEXT", align="C")
+                pdf.image(wordcloud_image, x=10, y=30, w=REPORT_IMAGE_WIDTH_MM, h=REPORT_IMAGE_WIDTH_MM / 2)
+                pdf.ln(105)
+                pdf.set_font("Helvetica", size=10)
+                if frequencies and frequencies.get(label):
+                    pdf.multi_cell(0, 6, safe_encode(f"Top words: {format_top_words(frequencies[label])}"))
+                    pdf.ln(2)
+                pdf.multi_cell(0, 6, safe_encode(gemini_responses[label]))
+
+        if response_result:
+            pdf.add_page()
+            pdf.set_font("Helvetica", size=14)
+            pdf.cell(200, 10, text="Executive Summary & Recommendations", new_x="LMARGIN", new_y="NEXT", align="C")
+            pdf.ln(10)
+            pdf.set_font("Helvetica", size=10)
+            pdf.multi_cell(0, 6, safe_encode(response_result))
+
+        pdf_bytes = bytes(pdf.output())
+        logger.info("PDF report generated successfully")
+        return pdf_bytes
+    except Exception as e:
+        logger.error(f"Error generating PDF: {e}")
+        return None
+
+def write_pdf_report(path: str, report: dict):
+    """Build a job's PDF report into `path` inside a CPU worker; returns its SHA-256, or None.
+
+    Only the digest travels back to the server process, which then serves the file
+    from disk in chunks rather than holding the document in memory.
+    """
+    pdf_bytes = create_pdf_report(
+        report["sentiment_counts"],
+        report["wordcloud_layouts"],
+        report["gemini_responses"],
+        report["response_result"],
+        report.get("frequencies"),
+    )
+    if not pdf_bytes:
+        return None
+    with open(path, "wb") as f:
+        f.write(pdf_bytes)
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+def report_cache_key(report: dict) -> str:
+    """Hash of a job's report inputs and the settings the PDF is drawn at"""
+    key_fields = {
+        "report": report,
+        "image_dpi": REPORT_IMAGE_DPI,
+        "image_format": REPORT_IMAGE_FORMAT,
+        "jpeg_quality": REPORT_JPEG_QUALITY,
+    }
+    return hashlib.sha256(json.dumps(key_fields, sort_keys=True).encode("utf-8")).hexdigest()
+
+_report_builds = {}
+
+async def get_or_build_report(report: dict):
+    """(path, etag) of the PDF for a job's report inputs, building and caching it on first use.
+
+    Concurrent downloads of the same report share one build, and jobs with identical
+    inputs (e.g. result cache hits) share one cached file.
+    """
+    key = report_cache_key(report)
+    hit = await pools.run_io(report_cache.get, key)
+    if hit is None:
+        build = _report_builds.get(key)
+        if build is None:
+            build = asyncio.create_task(_build_report(key, report))
+            _report_builds[key] = build
+            build.add_done_callback(lambda _: _report_builds.pop(key, None))
+        hit = await asyncio.shield(build)
+    entry_dir, meta = hit
+    return os.path.join(entry_dir, "report.pdf"), meta["etag"]
+
+async def _build_report(key: str, report: dict):
+    started = time.perf_counter()
+    fd, tmp_path = tempfile.mkstemp(dir=report_cache.root, prefix=".tmp-", suffix=".pdf")
+    os.close(fd)
+    try:
+        digest = await pools.run_cpu(write_pdf_report, tmp_path, report)
+        if not digest:
+            raise HTTPException(status_code=500, detail="Failed to generate the PDF report")
+        # A strong validator for these exact bytes, so If-None-Match and If-Range stay valid
+        etag = f'"{digest[:32]}"'
+        entry_dir = await pools.run_io(report_cache.put, key, {"etag": etag}, {"report.pdf": tmp_path})
+        size = os.path.getsize(tmp_path)
+    finally:
+        os.unlink(tmp_path)
+    logger.info(f"PDF report built in {time.perf_counter() - started:.2f}s ({size} bytes)")
+    return entry_dir, {"etag": etag}
+
+def render_no_comments_page():
+    """Page shown when a video has no comments to analyze"""
+    return site.render("no_comments.html")
+
+def render_results_page(total_comments, sentiment_counts, artifact_urls, gemini_responses, response_result,
+                        videos=None, live_job_id=None):
+    """Build the results page for a finished analysis.
+
+    With `live_job_id` the page is rendered empty, with every section hidden, and fills
+    itself in from /jobs/{id}/events as the stages of that running job finish.
+    """
+    return site.render(
+        "results.html",
+        live=live_job_id is not None,
+        live_job_id=live_job_id,
+        stage_titles=STAGE_TITLES,
+        total_comments=total_comments,
+        sentiment_counts=sentiment_counts,
+        artifact_urls=artifact_urls,
+        sentiment_cards={
+            "positive": ("fa-smile", "#10b981"),
+            "negative": ("fa-frown", "#ef4444"),
+            "neutral": ("fa-meh", "#f59e0b"),
+        },
+        # Gemini answers are markdown; their HTML goes into the page as is
+        insights={label: Markup(markdown(text)) for label, text in gemini_responses.items()},
+        summary=Markup(markdown(response_result)) if response_result else None,
+        videos=video_rows(videos) if videos else None,
+    )
+
+def render_live_results_page(job_id):
+    """Results page of a running job, filled in over Server-Sent Events"""
+    return render_results_page(0, {}, {}, {}, None, live_job_id=job_id)
+
+def video_rows(videos):
+    return [
+        {
+            "url": video["url"],
+            "video_id": video["video_id"],
+            "total": video["aggregate"].total,
+            "counts": video["aggregate"].counts(),
+            "status": video["error"] or video["status"],
+        }
+        for video in videos
+    ]
+
+def render_video_breakdown(videos):
+    """Per-video sentiment table for batch results"""
+    return site.render("video_breakdown.html", videos=video_rows(videos))
+
+def render_error_page(error):
+    """Friendly error page for a failed analysis"""
+    return site.render("error.html", error=str(error))
+
+async def load_sentiment_model():
+    """(pipeline, label index) of the process-wide sentiment model; loads it now if startup warm-up failed"""
+    try:
+        sentiment_analysis = await pools.run_io(sentiment_models.load)
+        return sentiment_analysis, sentiment_models.label_index
+    except Exception as e:
+        logger.error(f"Error loading sentiment model: {e}")
+        raise HTTPException(status_code=500, detail="Failed to load sentiment analysis model")
+
+async def score_chunk(job, texts, dedup, sentiment_analysis, label_index):
+    """Labels and scores for one micro-batch of cleaned comments, counted on the job.
+
+    If inference fails the batch is scored neutral (0.5) so the analysis can finish.
+    """
+    try:
+        labels, scores, new_groups = await pools.run_inference(
+            analyze_sentiment_deduped, texts, dedup, sentiment_analysis, label_index, sentiment_models.model_id,
+        )
+        job.comments["unique"] += new_groups
+    except Exception as e:
+        logger.error(f"Error during sentiment analysis: {e}")
+        job.degraded = True
+        labels = np.full(len(texts), "neutral", dtype=object)
+        scores = np.full(len(texts), 0.5, dtype=np.float64)
+    job.comments["scored"] += len(texts)
+    return labels, scores
+
+async def stream_score_comments(job, youtube_url, all_stopwords, state_key=None):
+    """Overlap download, micro-batch cleaning, batched inference and aggregation for one video.
+
+    Each stage runs as its own task and hands micro-batches to the next through a
+    bounded queue, so a slow stage applies backpressure instead of buffering the
+    whole comment section. With a `state_key` only comments newer than the previous
+    run are fetched and scored, and they are merged into the stored aggregate.
+    """
+    loop = asyncio.get_running_loop()
+    raw_batches = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    clean_batches = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    stop = threading.Event()
+    aggregate = SentimentAggregator()
+    seen = None
+    # (comment_id, label, score) of this run, saved with the aggregate once the stream completes
+    scored = []
+    # IDs of this run's comments that cleaning filtered out (empty or too long)
+    dropped = []
+    if state_key:
+        stored = await pools.run_io(video_state.load_aggregate, state_key)
+        if stored:
+            aggregate = SentimentAggregator.from_dict(stored)
+            logger.info(f"Refreshing video incrementally from {aggregate.total} stored comments")
+        seen = lambda comment_id: video_state.has_seen(state_key, comment_id)
+    job.aggregate = aggregate
+    dedup = CommentDeduplicator()
+
+    async def download():
+        with job.stage("download"):
+            # Fetch comments from a YouTube URL
+            try:
+                total = await pools.run_io(
+                    download_comment_batches, raw_batches, loop, stop, youtube_url,
+                    job.params["comment_limit"], STREAM_BATCH_SIZE, seen,
+                )
+                logger.info(f"Fetched {total} {'new ' if seen else ''}comments")
+            except Exception as e:
+                logger.error(f"Error fetching comments: {e}")
+                raise HTTPException(status_code=400, detail="Failed to fetch comments. Please check the YouTube URL.")
+        await raw_batches.put(_STREAM_END)
+
+    async def clean():
+        with job.stage("clean"):
+            while (batch := await raw_batches.get()) is not _STREAM_END:
+                job.comments["downloaded"] += len(batch)
+                cleaned = await pools.run_cpu(
+                    clean_text_data, comment_frame(batch), "comment", all_stopwords
+                )
+                job.comments["cleaned"] += len(cleaned)
+                if state_key and len(cleaned) < len(batch):
+                    # Never scored, but still seen: otherwise every refresh downloads them again
+                    kept = set(cleaned["comment_id"].to_list())
+                    dropped.extend(comment_id for comment_id, _ in batch if comment_id not in kept)
+                await clean_batches.put(cleaned)
+        await clean_batches.put(_STREAM_END)
+
+    async def infer():
+        with job.stage("infer"):
+            sentiment_analysis, label_index = await load_sentiment_model()
+
+            while (chunk := await clean_batches.get()) is not _STREAM_END:
+                # Apply sentiment analysis
+                labels, scores = await score_chunk(
+                    job, chunk["cleaned_text"].to_list(), dedup, sentiment_analysis, label_index
+                )
+                aggregate.update(chunk["cleaned_text"].to_numpy(), labels, scores)
+                if state_key:
+                    scored.extend(zip(chunk["comment_id"].to_list(), labels, scores))
+            logger.info(
+                f"Sentiment analysis completed for {job.comments['scored']} comments "
+                f"({dedup.unique} unique, {dedup.near_duplicates} near-duplicates collapsed)"
+            )
+
+    tasks = [asyncio.create_task(stage) for stage in (download(), clean(), infer())]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # Unblock the producer thread and tear down the other stages
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    if state_key:
+        await pools.run_io(
+            video_state.save_run, state_key, extract_video_id(youtube_url), scored, aggregate.to_dict(), dropped
+        )
+    return aggregate
+
+async def run_analysis(job):
+    """Run the whole analysis pipeline for a queued job and return the results page"""
+    youtube_url = job.params["youtube_url"]
+    custom_stopwords = job.params["custom_stopwords"]
+    custom_question = job.params["custom_question"]
+    logger.info(f"Starting analysis for URL: {youtube_url}")
+
+    # Process stopwords
+    all_stopwords = build_stopwords(custom_stopwords)
+
+    # Download, clean and score at the same time, linked by bounded queues
+    state_key = video_state_key(job.params) if job.params.get("incremental") else None
+    async with video_state_lock(state_key):
+        aggregate = await stream_score_comments(job, youtube_url, all_stopwords, state_key)
+
+    if aggregate.total == 0:
+        return render_no_comments_page()
+
+    return await render_analysis(job, aggregate, custom_question)
+
+async def render_analysis(job, aggregate, custom_question, videos=None):
+    """Chart, word clouds, Gemini insights and PDF for an aggregate, then the results page"""
+    # Count the occurrences of each sentiment label
+    sentiment_counts = aggregate.counts()
+    # One frequency table per sentiment feeds the word clouds, insights, JSON and the PDF
+    frequencies = aggregate.frequency_tables()
+    job.frequencies = frequencies
+
+    # Counts are final once inference is done; the results page can show them straight away
+    job.publish("counts", {"total": aggregate.total, "counts": sentiment_counts})
+
+    # Stages hand each other bytes in memory (served from there while the job runs);
+    # everything is written once, at the end
+    with job.stage("plot"):
+        # Create modern sentiment distribution plot; the PDF, if requested, draws its own raster copy
+        sentiment_plot = await pools.run_cpu(create_sentiment_plot, sentiment_counts)
+        if sentiment_plot:
+            job.publish("chart", {"url": job.add_output("sentiment_distribution.svg", sentiment_plot)})
+
+    async def draw_wordcloud(label, colormap):
+        wordcloud_png, layout = await pools.run_cpu(create_modern_wordcloud, frequencies[label], colormap)
+        if wordcloud_png:
+            url = job.add_output(f"wordcloud_{label}.png", wordcloud_png)
+            job.publish("wordcloud", {"label": label, "url": url})
+        return wordcloud_png, layout
+
+    with job.stage("wordcloud"):
+        # Generate wordclouds with different color schemes, one worker process each
+        # Only the preview is drawn now; the PDF redraws the layout at print resolution
+        colormaps = {"positive": "Greens", "negative": "Reds", "neutral": "Blues"}
+        rendered = await asyncio.gather(*(
+            draw_wordcloud(label, colormap) for label, colormap in colormaps.items()
+        ))
+        wordcloud_images = {}
+        wordcloud_layouts = {}
+        for (label, colormap), (wordcloud_png, layout) in zip(colormaps.items(), rendered):
+            wordcloud_images[label] = wordcloud_png
+            wordcloud_layouts[label] = (layout, colormap)
+
+    def insight_failed(label):
+        job.degraded = True
+
+    with job.stage("insights"):
+        # Generate Gemini responses for each sentiment and the summary concurrently
+        gemini_responses, response_result = await generate_gemini_insights(
+            custom_question, wordcloud_images, frequencies,
+            on_answer=lambda label, text: job.publish("insight", {"label": label, "html": markdown(text)}),
+            on_fallback=insight_failed,
+        )
+
+    # The PDF is only built if someone downloads it; keep what it is drawn from, as plain
+    # JSON types (layouts hold numpy ints) so it can be hashed and stored with the results
+    job.report = json.loads(json.dumps({
+        "sentiment_counts": sentiment_counts,
+        "wordcloud_layouts": wordcloud_layouts,
+        "gemini_responses": gemini_responses,
+        "response_result": response_result,
+        "frequencies": frequencies,
+    }, default=lambda value: value.item()))
+    job.publish("report", {"url": f"/jobs/{job.id}/report.pdf"})
+    if videos:
+        job.publish("videos", {"html": render_video_breakdown(videos)})
+
+    job.artifacts.update(await pools.run_io(job.write_outputs))
+    job.outputs = {}
+
+    return render_results_page(
+        aggregate.total, sentiment_counts, job.artifact_urls(), gemini_responses, response_result,
+        videos,
+    )
+
+async def score_batch_videos(job, all_stopwords):
+    """Download and clean several videos concurrently while one task scores all of them.
+
+    Cleaned micro-batches from every video land on one queue; the inference task pools
+    whatever is waiting into shared model batches and routes the labels back to each
+    video's aggregator. A video that fails to download doesn't stop the others.
+    """
+    loop = asyncio.get_running_loop()
+    clean_batches = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    download_slots = asyncio.Semaphore(BATCH_DOWNLOAD_CONCURRENCY)
+    pool_size = SENTIMENT_BATCH_SIZE * 4
+    stops = []
+
+    async def video_stream(video):
+        raw_batches = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        stop = threading.Event()
+        stops.append(stop)
+
+        async def produce():
+            total = await pools.run_io(
+                download_comment_batches, raw_batches, loop, stop, video["url"], job.params["comment_limit"]
+            )
+            await raw_batches.put(_STREAM_END)
+            return total
+
+        async with download_slots:
+            video["status"] = "downloading"
+            producer = asyncio.create_task(produce())
+            try:
+                while True:
+                    if producer.done():
+                        # Re-raises a download error; otherwise the end marker is queued
+                        producer.result()
+                        batch = await raw_batches.get()
+                    else:
+                        # Surface download errors instead of waiting for a batch that never comes
+                        getter = asyncio.create_task(raw_batches.get())
+                        await asyncio.wait({getter, producer}, return_when=asyncio.FIRST_COMPLETED)
+                        if not getter.done():
+                            getter.cancel()
+                            continue
+                        batch = getter.result()
+                    if batch is _STREAM_END:
+                        break
+                    video["comments"]["downloaded"] += len(batch)
+                    cleaned = await pools.run_cpu(
+                        clean_text_data, comment_frame(batch), "comment", all_stopwords
+                    )
+                    video["comments"]["cleaned"] += len(cleaned)
+                    await clean_batches.put((video, cleaned))
+                video["status"] = "scoring"
+            except Exception as e:
+                logger.error(f"Error fetching comments for {video['url']}: {e}")
+                video["status"] = "failed"
+                video["error"] = "Failed to fetch comments"
+            finally:
+                stop.set()
+                if not producer.done():
+                    producer.cancel()
+
+    async def download():
+        with job.stage("download"), job.stage("clean"):
+            await asyncio.gather(*(video_stream(video) for video in job.videos))
+        await clean_batches.put(_STREAM_END)
+
+    async def infer():
+        # Scoring runs alongside the downloads, so the stage covers the whole batch
+        with job.stage("infer"):
+            sentiment_analysis, label_index = await load_sentiment_model()
+
+            # One dedup index across videos: the same spam wave often hits a whole playlist
+            dedup = CommentDeduplicator()
+            finished = False
+            while not finished:
+                item = await clean_batches.get()
+                if item is _STREAM_END:
+                    break
+                # Pool micro-batches from different videos into one model call
+                pooled = [item]
+                size = len(item[1])
+                while size < pool_size and not clean_batches.empty():
+                    item = clean_batches.get_nowait()
+                    if item is _STREAM_END:
+                        finished = True
+                        break
+                    pooled.append(item)
+                    size += len(item[1])
+
+                texts = [text for _, chunk in pooled for text in chunk["cleaned_text"].to_list()]
+                labels, scores = await score_chunk(job, texts, dedup, sentiment_analysis, label_index)
+
+                offset = 0
+                for video, chunk in pooled:
+                    end = offset + len(chunk)
+                    video["aggregate"].update(chunk["cleaned_text"].to_numpy(), labels[offset:end], scores[offset:end])
+                    video["comments"]["scored"] += len(chunk)
+                    offset = end
+
+    tasks = [asyncio.create_task(stage) for stage in (download(), infer())]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # A failed model load must not leave the downloads blocked on a queue nobody reads
+        for stop in stops:
+            stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    for video in job.videos:
+        if video["status"] != "failed":
+            video["status"] = "done"
+        job.comments["downloaded"] += video["comments"]["downloaded"]
+        job.comments["cleaned"] += video["comments"]["cleaned"]
+
+async def run_batch_analysis(job):
+    """Score every video of a batch, then build one combined report across all of them"""
+    logger.info(f"Starting batch analysis of {len(job.videos)} videos")
+
+    # Process stopwords
+    all_stopwords = build_stopwords(job.params["custom_stopwords"])
+
+    await score_batch_videos(job, all_stopwords)
+
+    combined = SentimentAggregator()
+    for video in job.videos:
+        combined.merge(video["aggregate"])
+    job.aggregate = combined
+
+    if combined.total == 0:
+        return render_no_comments_page()
+
+    return await render_analysis(job, combined, job.params["custom_question"], job.videos)
+
+@app.post("/analyze")
+async def analyze_youtube(
+    request: Request,
+    youtube_url: str = Form(...),
+    custom_stopwords: str = Form(""),
+    custom_question: str = Form("Please provide insights based on the sentiment analysis:"),
+    comment_limit: str = Form(""),
+    incremental: bool = Form(False),
+):
+    """Queue an analysis and return its job ID right away"""
+    # Validate inputs
+    if not youtube_url:
+        raise HTTPException(status_code=400, detail="YouTube URL is required")
+    try:
+        limit = int(comment_limit) if comment_limit.strip() else COMMENT_LIMIT
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Comment limit must be a whole number")
+    if limit < 0:
+        raise HTTPException(status_code=400, detail="Comment limit cannot be negative")
+
+    params = {
+        "youtube_url": youtube_url,
+        "custom_stopwords": custom_stopwords,
+        "custom_question": custom_question,
+        # None streams every comment the video has
+        "comment_limit": limit or None,
+        "incremental": incremental,
+    }
+    wants_json = "application/json" in request.headers.get("accept", "")
+
+    # Popular videos are re-run all day; serve an identical earlier analysis straight from disk
+    cached = None
+    if not incremental:
+        cached = await pools.run_io(result_cache.get, result_cache_key(params))
+    if cached:
+        entry_dir, meta = cached
+        job = job_queue.add_cached(await pools.run_io(load_cached_result, params, entry_dir, meta))
+        logger.info(f"Result cache hit for URL: {youtube_url} (job {job.id})")
+        if not wants_json:
+            return RedirectResponse(url=f"/jobs/{job.id}/results", status_code=303)
+    else:
+        job = job_queue.submit(params)
+        logger.info(f"Queued analysis job {job.id} for URL: {youtube_url}")
+
+    if wants_json:
+        return JSONResponse(
+            content={
+                "job_id": job.id,
+                "status_url": f"/jobs/{job.id}",
+                "results_url": f"/jobs/{job.id}/results",
+            },
+            status_code=202,
+        )
+    return HTMLResponse(content=render_live_results_page(job.id), status_code=202)
+
+class BatchAnalysisRequest(BaseModel):
+    urls: List[str] = []
+    playlist_url: Optional[str] = None
+    custom_stopwords: str = ""
+    custom_question: str = "Please provide insights based on the sentiment analysis:"
+    comment_limit: Optional[int] = None
+
+@app.post("/batch")
+async def analyze_batch(batch: BatchAnalysisRequest):
+    """Queue one analysis over many videos (explicit URLs and/or a playlist)"""
+    urls = list(batch.urls)
+    if batch.playlist_url:
+        try:
+            urls += await pools.run_io(expand_playlist, batch.playlist_url)
+        except Exception as e:
+            logger.error(f"Error expanding playlist {batch.playlist_url}: {e}")
+            raise HTTPException(status_code=400, detail="Failed to read the playlist. Please check the URL.")
+
+    # One entry per video even if it was listed twice or is also in the playlist
+    urls = list({extract_video_id(url): url.strip() for url in urls if url.strip()}.values())
+    if not urls:
+        raise HTTPException(status_code=400, detail="At least one YouTube URL or a playlist is required")
+    if len(urls) > BATCH_MAX_VIDEOS:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {BATCH_MAX_VIDEOS} videos")
+    limit = COMMENT_LIMIT if batch.comment_limit is None else batch.comment_limit
+    if limit < 0:
+        raise HTTPException(status_code=400, detail="Comment limit cannot be negative")
+
+    params = {
+        "youtube_url": urls[0],
+        "custom_stopwords": batch.custom_stopwords,
+        "custom_question": batch.custom_question,
+        "comment_limit": limit or None,
+        "incremental": False,
+    }
+    job = job_queue.submit(params, BatchJob(params, urls))
+    logger.info(f"Queued batch job {job.id} for {len(urls)} videos")
+    return JSONResponse(
+        content={
+            "job_id": job.id,
+            "videos": len(urls),
+            "status_url": f"/jobs/{job.id}",
+            "results_url": f"/jobs/{job.id}/results",
+        },
+        status_code=202,
+    )
+
+class ParityRequest(BaseModel):
+    texts: List[str] = []
+
+@app.post("/model/parity")
+async def model_parity(request: ParityRequest = None):
+    """Compare the active inference backend's labels with the PyTorch reference"""
+    texts = request.texts if request and request.texts else None
+    try:
+        return await pools.run_io(sentiment_models.check_parity, texts)
+    except Exception as e:
+        logger.error(f"Error running backend parity check: {e}")
+        raise HTTPException(status_code=500, detail="Parity check failed")
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit rates of the result, Gemini insights, PDF report and per-comment sentiment caches"""
+    return {
+        "results": result_cache.stats(),
+        "insights": insights_cache.stats(),
+        "reports": report_cache.stats(),
+        "comments": await pools.run_io(comment_cache.stats),
+    }
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Per-stage progress of an analysis job"""
+    return get_job_or_404(job_id).to_dict()
+
+@app.get("/jobs/{job_id}/results", response_class=HTMLResponse)
+async def job_results(job_id: str):
+    """Finished results page, or one that fills in over /events while the job is still running"""
+    job = get_job_or_404(job_id)
+    if not job.finished:
+        return HTMLResponse(content=render_live_results_page(job.id), status_code=202)
+    return job.result_html
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """Server-Sent Events stream of a job's progress and results, stage by stage.
+
+    Every event the job has published is replayed first (after `Last-Event-ID` when a
+    browser reconnects), then new ones are pushed as they happen. The stream ends
+    with a `done` or `failed` event.
+    """
+    job = get_job_or_404(job_id)
+    try:
+        seen = int(request.headers.get("last-event-id", "-1")) + 1
+    except ValueError:
+        seen = 0
+    if not 0 <= seen <= len(job.events):
+        # Not an id this job handed out: replay from the start
+        seen = 0
+
+    async def stream():
+        nonlocal seen
+        while True:
+            if seen and job.events[seen - 1][0] in ("done", "failed"):
+                # The client already has the final event
+                return
+            while seen < len(job.events):
+                event, data = job.events[seen]
+                yield f"id: {seen}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+                seen += 1
+                if event in ("done", "failed"):
+                    return
+            try:
+                await asyncio.wait_for(job.wait_for_event(seen), EVENT_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/jobs/{job_id}/frequencies")
+async def job_frequencies(job_id: str, limit: int = 50):
+    """Most frequent tokens per sentiment, the same tables the word clouds were drawn from"""
+    job = get_job_or_404(job_id)
+    if job.frequencies is None:
+        raise HTTPException(status_code=404, detail="Frequencies not available yet")
+    limit = max(1, min(limit, FREQUENCY_TABLE_SIZE))
+    return {
+        "job_id": job.id,
+        "frequencies": {
+            label: [{"token": word, "count": count} for word, count in islice(table.items(), limit)]
+            for label, table in job.frequencies.items()
+        },
+    }
+
+@app.get("/jobs/{job_id}/artifacts/{name}")
+async def job_artifact(job_id: str, name: str):
+    """Charts, word clouds and the PDF report produced by a job"""
+    job = get_job_or_404(job_id)
+    headers = {}
+    # Accept the logical name (wordcloud_positive.png) or the stored content-addressed one
+    path = job.artifacts.get(name)
+    if path is None:
+        path = artifact_store.resolve(job.id, name)
+        # Content-addressed names never change meaning, so browsers may cache them forever
+        headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    output = job.outputs.get(name) if path is None else None
+    if output:
+        # Produced by a running job and streamed to its page, but not written to disk yet
+        media_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        return Response(content=output[1], media_type=media_type, headers=headers)
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    return FileResponse(path, headers=headers)
+
+@app.get("/jobs/{job_id}/report.pdf")
+async def job_report(job_id: str, request: Request):
+    """PDF report of a job, built on the first download and served from cache after.
+
+    Available as soon as the report inputs are final (the `report` event), even while
+    the job is still saving its outputs.
+    """
+    job = get_job_or_404(job_id)
+    if job.report is None:
+        if not job.finished:
+            raise HTTPException(status_code=409, detail="Analysis is still running")
+        raise HTTPException(status_code=404, detail="No report available for this job")
+    path, etag = await get_or_build_report(job.report)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    # FileResponse answers Range and If-Range requests (resumed or partial downloads) itself
+    return FileResponse(
+        path,
+        media_type="application/pdf",
+        filename="sentiment_analysis_report.pdf",
+        content_disposition_type="inline",
+        headers=headers,
+    )
+
+# Add error handler for development
+@app.exception_handler(500)
+async def internal_error_handler(request, exc):
+    logger.error(f"Internal server error: {exc}")
+    return HTMLResponse(
+        content="""
+        <html>
+            <body style="font-family: Arial, sans-serif; text-align: center; padding: 50px;">
+                <h1 style="color: #dc2626;">Internal Server Error</h1>
+                <p>Something went wrong on our end. Please try again later.</p>
+                <a href="/" style="background: #667eea; color: white; padding: 10px 20px; text-decoration: none; border-radius: 5px;">Go Home</a>
+            </body>
+        </html>
+        """,
+        status_code=500
+    )
+
+startup_report.module_import_seconds = startup_report.since_start()
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        app,
+        host="127.0.0.1",
+        port=9000,
+        log_level="info",
+        access_log=True,
+    )
@@ -0,0 +1,157 @@
+// Initialize page animations and interactions
+class SentimentAnalyzer {
+    constructor() {
+        this.init();
+    }
+
+    init() {
+        this.createParticles();
+        this.setupFormHandlers();
+        this.setupScrollProgress();
+        this.setupInputAnimations();
+        this.setupFeatureAnimations();
+    }
+
+    // Create floating particles
+    createParticles() {
+        const container = document.getElementById('particlesContainer');
+        const particleCount = 30;
+
+        for (let i = 0; i < particleCount; i++) {
+            const particle = document.createElement('div');
+            particle.className = 'particle';
+
+            // Random positioning and timing
+            particle.style.left = Math.random() * 100 + '%';
+            particle.style.animationDelay = Math.random() * 8 + 's';
+            particle.style.animationDuration = (8 + Math.random() * 4) + 's';
+
+            container.appendChild(particle);
+        }
+    }
+
+    // Setup form submission handling
+    setupFormHandlers() {
+        const form = document.getElementById('sentimentForm');
+        const loadingOverlay = document.getElementById('loadingOverlay');
+
+        form.addEventListener('submit', (e) => {
+            // Show loading overlay
+            loadingOverlay.classList.add('show');
+
+            // Disable form
+            const submitBtn = form.querySelector('.btn-submit');
+            submitBtn.disabled = true;
+            submitBtn.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Processing...';
+        });
+    }
+
+    // Setup scroll progress bar
+    setupScrollProgress() {
+        const progressBar = document.getElementById('progressBar');
+
+        window.addEventListener('scroll', () => {
+            const scrollTop = window.pageYOffset;
+            const docHeight = document.body.offsetHeight - window.innerHeight;
+            const scrollPercent = (scrollTop / docHeight) * 100;
+
+            progressBar.style.width = scrollPercent + '%';
+        });
+    }
+
+    // Setup input animations
+    setupInputAnimations() {
+        const inputs = document.querySelectorAll('.form-control');
+
+        inputs.forEach(input => {
+            input.addEventListener('focus', () => {
+                input.parentElement.style.transform = 'scale(1.02)';
+                input.parentElement.style.transition = 'transform 0.3s ease';
+            });
+
+            input.addEventListener('blur', () => {
+                input.parentElement.style.transform = 'scale(1)';
+            });
+
+            // Real-time validation feedback
+            input.addEventListener('input', () => {
+                if (input.checkValidity()) {
+                    input.style.borderColor = '#10b981';
+                } else {
+                    input.style.borderColor = '#ef4444';
+                }
+            });
+        });
+    }
+
+    // Setup feature card animations
+    setupFeatureAnimations() {
+        const features = document.querySelectorAll('.feature-card');
+
+        const observer = new IntersectionObserver((entries) => {
+            entries.forEach((entry, index) => {
+                if (entry.isIntersecting) {
+                    setTimeout(() => {
+                        entry.target.style.opacity = '1';
+                        entry.target.style.transform = 'translateY(0)';
+                    }, index * 100);
+                }
+            });
+        }, { threshold: 0.1 });
+
+        features.forEach(feature => {
+            feature.style.opacity = '0';
+            feature.style.transform = 'translateY(50px)';
+            feature.style.transition = 'all 0.6s ease';
+            observer.observe(feature);
+        });
+    }
+}
+
+// Add ripple effect to button
+function addRippleEffect() {
+    const button = document.querySelector('.btn-submit');
+
+    button.addEventListener('click', function(e) {
+        const ripple = document.createElement('div');
+        const rect = this.getBoundingClientRect();
+        const size = Math.max(rect.width, rect.height);
+        const x = e.clientX - rect.left - size / 2;
+        const y = e.clientY - rect.top - size / 2;
+
+        ripple.style.cssText = `
+            position: absolute;
+            width: ${size}px;
+            height: ${size}px;
+            left: ${x}px;
+            top: ${y}px;
+            background: rgba(255,255,255,0.4);
+            border-radius: 50%;
+            transform: scale(0);
+            animation: ripple 0.8s ease-out;
+            pointer-events: none;
+        `;
+
+        this.appendChild(ripple);
+
+        setTimeout(() => ripple.remove(), 800);
+    });
+}
+
+// Add CSS for ripple animation
+const rippleStyle = document.createElement('style');
+rippleStyle.textContent = `
+    @keyframes ripple {
+        to {
+            transform: scale(2.5);
+            opacity: 0;
+        }
+    }
+`;
+document.head.appendChild(rippleStyle);
+
+// Initialize everything when DOM is loaded
+document.addEventListener('DOMContentLoaded', () => {
+    new SentimentAnalyzer();
+    addRippleEffect();
+});
@@ -0,0 +1,102 @@
+// Add smooth scrolling and animations
+document.addEventListener('DOMContentLoaded', function() {
+    // Stagger card animations
+    const cards = document.querySelectorAll('.result-card');
+    cards.forEach((card, index) => {
+        card.style.animationDelay = (index * 0.1) + 's';
+    });
+
+    // Add click-to-zoom for images
+    const images = document.querySelectorAll('.card-body img');
+    images.forEach(img => {
+        img.addEventListener('click', function() {
+            if (this.style.position === 'fixed') {
+                // Close zoom
+                this.style.position = '';
+                this.style.top = '';
+                this.style.left = '';
+                this.style.width = '';
+                this.style.height = '';
+                this.style.zIndex = '';
+                this.style.cursor = '';
+                document.body.style.overflow = '';
+            } else {
+                // Open zoom
+                this.style.position = 'fixed';
+                this.style.top = '50%';
+                this.style.left = '50%';
+                this.style.width = '90%';
+                this.style.height = 'auto';
+                this.style.transform = 'translate(-50%, -50%)';
+                this.style.zIndex = '1000';
+                this.style.cursor = 'zoom-out';
+                document.body.style.overflow = 'hidden';
+            }
+        });
+    });
+});
+
+// Running jobs: fill the page in from the job's event stream as each stage finishes
+function followJob(jobId, stageTitles) {
+    history.replaceState(null, '', '/jobs/' + jobId + '/results');
+    const source = new EventSource('/jobs/' + jobId + '/events');
+    let countsReceived = false;
+
+    function on(event, handler) {
+        source.addEventListener(event, e => handler(JSON.parse(e.data)));
+    }
+
+    function show(id) {
+        document.getElementById(id).style.display = '';
+    }
+
+    on('stage', data => {
+        if (data.state === 'running') {
+            document.getElementById('results-subtitle').textContent = stageTitles[data.name] + '...';
+        }
+    });
+    on('counts', data => {
+        countsReceived = true;
+        document.getElementById('stat-total').textContent = data.total;
+        ['positive', 'neutral', 'negative'].forEach(label => {
+            document.getElementById('stat-' + label).textContent = data.counts[label] || 0;
+        });
+    });
+    on('chart', data => {
+        document.getElementById('chart-image').src = data.url;
+        show('card-chart');
+    });
+    on('wordcloud', data => {
+        document.getElementById('wordcloud-' + data.label).src = data.url;
+        show('card-' + data.label);
+    });
+    on('insight', data => {
+        document.getElementById('insight-' + data.label).innerHTML = data.html;
+        if (data.label === 'summary') show('card-summary');
+    });
+    on('videos', data => {
+        document.getElementById('video-breakdown').innerHTML = data.html;
+    });
+    on('report', data => {
+        document.getElementById('report-link').href = data.url;
+        show('download-section');
+    });
+    on('done', data => {
+        source.close();
+        if (!countsReceived) {
+            // Nothing to stream (no comments, or a cached result): show the stored page
+            window.location.replace(data.results_url);
+            return;
+        }
+        document.getElementById('results-title').innerHTML = '<i class="fas fa-chart-line"></i> Analysis Complete!';
+        document.getElementById('results-subtitle').textContent = 'Here are your comprehensive sentiment analysis results';
+    });
+    on('failed', data => {
+        source.close();
+        window.location.replace(data.results_url);
+    });
+}
+
+if (document.body.dataset.jobId) {
+    followJob(document.body.dataset.jobId, JSON.parse(document.body.dataset.stageTitles));
+}